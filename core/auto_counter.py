@@ -5,31 +5,37 @@ This module provides intelligent selection between single-threaded and parallel
 ultra-safe bitwise implementations based on problem characteristics.
 """
 
-import multiprocessing as mp
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Tuple, Optional
 
 from core.ultra_safe_bitwise import count_rectangles_ultra_safe_bitwise
-from core.parallel_ultra_bitwise import count_rectangles_parallel_first_column
-from core.counter import CountResult
+from core.parallel_ultra_bitwise import count_rectangles_parallel_first_column, default_num_processes
+from core.counter import CountResult, count_nlr_r2
+
+if TYPE_CHECKING:
+    from cache.cache_manager import CacheManager
 
 
 def count_rectangles_auto(r: int, n: int, 
                           num_processes: Optional[int] = None,
                           force_parallel: bool = False,
-                          force_single: bool = False) -> CountResult:
+                          force_single: bool = False,
+                          cache_manager: Optional['CacheManager'] = None) -> CountResult:
     """
     Automatically select the best counting method based on problem size.
     
     Selection strategy:
+    - r = 2: Derangement formula (no enumeration, no process pool)
     - n ≤ 6: Single-threaded ultra-safe bitwise (already very fast, <2s)
-    - n ≥ 7: Parallel ultra-safe bitwise with 8 processes (large problems)
+    - n ≥ 7: Parallel ultra-safe bitwise on all available CPUs (large problems)
     
     Args:
         r: Number of rows
         n: Number of columns
-        num_processes: Number of processes for parallel (None = auto-detect, default 8)
+        num_processes: Number of processes for parallel (None = all available CPUs)
         force_parallel: Force parallel processing even for small n
         force_single: Force single-threaded processing even for large n
+        cache_manager: Optional CacheManager; a cached (r, n) result is returned
+            without starting any computation, and new results are stored in it
         
     Returns:
         CountResult with computation results
@@ -40,6 +46,22 @@ def count_rectangles_auto(r: int, n: int,
     if force_single and force_parallel:
         raise ValueError("Cannot force both single and parallel processing")
     
+    # A persisted result makes any worker start-up unnecessary
+    if cache_manager is not None:
+        cached_result = cache_manager.get(r, n)
+        if cached_result is not None:
+            print(f"💾 Using cached result for ({r},{n})")
+            return cached_result
+    
+    if r == 2:
+        # Closed form over derangements - nothing to enumerate or distribute
+        print(f"⚡ Auto-selected: Derangement formula (r=2)")
+        
+        start_time = time.time()
+        result = count_nlr_r2(n)
+        result.computation_time = time.time() - start_time
+        return _store_result(result, cache_manager)
+    
     # Determine processing mode
     if force_single:
         use_parallel = False
@@ -60,12 +82,12 @@ def count_rectangles_auto(r: int, n: int,
     if use_parallel:
         # Use parallel ultra-safe bitwise
         if num_processes is None:
-            num_processes = min(mp.cpu_count(), 8)
+            num_processes = default_num_processes()
         
         print(f"🚀 Auto-selected: Parallel ultra-safe bitwise ({reason})")
         print(f"   Using {num_processes} processes")
         
-        return count_rectangles_parallel_first_column(r, n, num_processes)
+        return _store_result(count_rectangles_parallel_first_column(r, n, num_processes), cache_manager)
     else:
         # Use single-threaded ultra-safe bitwise
         print(f"⚡ Auto-selected: Single-threaded ultra-safe bitwise ({reason})")
@@ -74,14 +96,21 @@ def count_rectangles_auto(r: int, n: int,
         total, positive, negative = count_rectangles_ultra_safe_bitwise(r, n)
         computation_time = time.time() - start_time
         
-        return CountResult(
+        return _store_result(CountResult(
             r=r, n=n,
             positive_count=positive,
             negative_count=negative,
             difference=positive - negative,
             from_cache=False,
             computation_time=computation_time
-        )
+        ), cache_manager)
+
+
+def _store_result(result: CountResult, cache_manager: Optional['CacheManager']) -> CountResult:
+    """Persist a freshly computed result when a cache manager is given."""
+    if cache_manager is not None:
+        cache_manager.put(result)
+    return result
 
 
 def get_recommended_processes(n: int) -> int:
@@ -97,8 +126,8 @@ def get_recommended_processes(n: int) -> int:
     if n <= 6:
         return 1  # Single-threaded
     else:
-        # For large problems, use up to 8 processes
-        return min(mp.cpu_count(), 8)
+        # For large problems, use every available CPU
+        return default_num_processes()
 
 
 def estimate_computation_time(r: int, n: int, num_processes: Optional[int] = None) -> str:
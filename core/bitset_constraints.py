@@ -109,6 +109,32 @@ class BitsetConstraints:
         for col_idx, value in enumerate(row):
             self.forbidden[col_idx] &= ~(1 << (value - 1))
     
+    def push_row(self, row_bits: tuple):
+        """
+        Add a compatible row given as precomputed single-bit masks.
+        
+        row_bits[col] is ``1 << (value - 1)`` for the row's value in that
+        column. The row must not conflict with the current constraints, so
+        each bit is new and a XOR sets it; pop_row with the same masks undoes it.
+        
+        Args:
+            row_bits: One single-bit mask per column
+        """
+        forbidden = self.forbidden
+        for col_idx, bit in enumerate(row_bits):
+            forbidden[col_idx] ^= bit
+    
+    def pop_row(self, row_bits: tuple):
+        """
+        Remove a row previously added with push_row.
+        
+        Args:
+            row_bits: The same single-bit masks passed to push_row
+        """
+        forbidden = self.forbidden
+        for col_idx, bit in enumerate(row_bits):
+            forbidden[col_idx] ^= bit
+    
     def add_rows_constraints(self, rows: List[List[int]]):
         """
         Add constraints for multiple rows in a single batch operation.
@@ -172,6 +198,18 @@ class BitsetConstraints:
         
         return available
     
+    def fingerprint(self) -> tuple:
+        """
+        Get a hashable snapshot of the constraint state.
+        
+        Two constraint objects with equal fingerprints forbid exactly the same
+        values at every position, so it can key caches of constraint results.
+        
+        Returns:
+            Tuple of per-position forbidden bitsets
+        """
+        return tuple(self.forbidden)
+    
     def copy(self) -> 'BitsetConstraints':
         """
         Create a copy of the constraints.
@@ -14,7 +14,7 @@ from pathlib import Path
 from dataclasses import dataclass
 
 from core.bitset_constraints import BitsetConstraints
-from core.smart_derangement_cache import SmartDerangementCache
+from core.smart_derangement_cache import SmartDerangementCache, _CONSTRAINT_CACHE_SIZE
 
 
 @dataclass
@@ -109,11 +109,14 @@ class CompactDerangementCache:
         self.derangements: Optional[np.ndarray] = None    # shape: (count, n), dtype: uint8
         self.signs: Optional[np.ndarray] = None           # shape: (count,), dtype: int8
         
+        # Python-list view of the arrays, converted on first request
+        self._derangements_with_signs: Optional[List[Tuple[List[int], int]]] = None
+        
         # Database-style indices (same as JSON version for compatibility)
         self.position_value_index: Dict[Tuple[int, int], Set[int]] = {}
         self.prefix_index: Dict[int, List[int]] = {}
         self.multi_prefix_index: Dict[Tuple[int, ...], List[int]] = {}
-        self.constraint_cache: Dict[str, Set[int]] = {}
+        self.constraint_cache: Dict[tuple, Tuple[Tuple[List[int], int], ...]] = {}
         
         # PERFORMANCE OPTIMIZATION: Pre-computed bitwise conflict masks
         self.conflict_masks: Dict[Tuple[int, int], int] = {}
@@ -382,19 +385,15 @@ class CompactDerangementCache:
         
         num_derangements = len(self.derangements)
         
-        # Pre-compute conflict bitsets - each conflict set becomes a bitmask
+        # Pre-compute conflict bitsets - each conflict set becomes a bitmask.
+        # Pack each (pos, val) column test into bytes with NumPy instead of
+        # OR-ing one bit at a time into an ever-growing Python int.
         self.conflict_masks = {}
         for pos in range(self.n):
+            column = self.derangements[:, pos]
             for val in range(1, self.n + 1):
-                conflict_key = (pos, val)
-                if conflict_key in self.position_value_index:
-                    # Convert conflict indices to bitmask
-                    mask = 0
-                    for conflict_idx in self.position_value_index[conflict_key]:
-                        mask |= (1 << conflict_idx)
-                    self.conflict_masks[conflict_key] = mask
-                else:
-                    self.conflict_masks[conflict_key] = 0
+                packed = np.packbits(column == val, bitorder='little')
+                self.conflict_masks[(pos, val)] = int.from_bytes(packed.tobytes(), 'little')
         
         # All derangements initially valid (all bits set)
         self.all_valid_mask = (1 << num_derangements) - 1
@@ -450,9 +449,12 @@ class CompactDerangementCache:
         if self.derangements is None or self.signs is None:
             return []
         
-        # PERFORMANCE FIX: Convert NumPy arrays to Python lists for ultra_safe_bitwise compatibility
-        return [(derangement.tolist(), int(sign)) 
-                for derangement, sign in zip(self.derangements, self.signs)]
+        # PERFORMANCE FIX: Convert NumPy arrays to Python lists for ultra_safe_bitwise compatibility.
+        # The arrays never change after loading, so convert once (two bulk
+        # tolist calls) and hand out shallow copies like SmartDerangementCache
+        if self._derangements_with_signs is None:
+            self._derangements_with_signs = list(zip(self.derangements.tolist(), self.signs.tolist()))
+        return self._derangements_with_signs.copy()
     
     def get_compatible_derangements(self, constraints: BitsetConstraints, 
                                   max_prefix_length: int = 2) -> List[Tuple[List[int], int]]:
@@ -467,17 +469,13 @@ class CompactDerangementCache:
         if self.derangements is None or self.signs is None:
             return []
         
-        # Check cache first
-        constraint_hash = self._get_constraint_hash(constraints)
-        if constraint_hash in self.constraint_cache:
-            compatible_indices = self.constraint_cache[constraint_hash]
-            # PERFORMANCE FIX: Convert NumPy arrays to Python lists for ultra_safe_bitwise compatibility
-            result = []
-            for i in compatible_indices:
-                derangement = self.derangements[i].tolist()  # Convert to Python list
-                sign = int(self.signs[i])
-                result.append((derangement, sign))
-            return result
+        # Check cache first; a hit moves the entry to the most recent end and
+        # reuses the already-converted Python lists
+        fingerprint = constraints.fingerprint()
+        cached = self.constraint_cache.pop(fingerprint, None)
+        if cached is not None:
+            self.constraint_cache[fingerprint] = cached
+            return list(cached)
         
         # Start with all derangement indices
         compatible_indices = set(range(len(self.derangements)))
@@ -494,28 +492,15 @@ class CompactDerangementCache:
             if not compatible_indices:
                 break
         
-        # Cache the result
-        self.constraint_cache[constraint_hash] = compatible_indices
-        
         # PERFORMANCE FIX: Convert NumPy arrays to Python lists for ultra_safe_bitwise compatibility
-        result = []
-        for i in compatible_indices:
-            derangement = self.derangements[i].tolist()  # Convert to Python list
-            sign = int(self.signs[i])
-            result.append((derangement, sign))
-        return result
-    
-    def _get_constraint_hash(self, constraints: BitsetConstraints) -> str:
-        """Generate a hash key for constraint state for caching."""
-        forbidden_list = []
-        for pos in range(self.n):
-            forbidden_vals = []
-            for val in range(1, self.n + 1):
-                if constraints.is_forbidden(pos, val):
-                    forbidden_vals.append(val)
-            if forbidden_vals:
-                forbidden_list.append(f"{pos}:{','.join(map(str, forbidden_vals))}")
-        return "|".join(forbidden_list)
+        compatible = tuple((self.derangements[i].tolist(), int(self.signs[i]))
+                           for i in compatible_indices)
+        
+        # Cache the result, evicting the least recently used
+        self.constraint_cache[fingerprint] = compatible
+        if len(self.constraint_cache) > _CONSTRAINT_CACHE_SIZE:
+            del self.constraint_cache[next(iter(self.constraint_cache))]
+        return list(compatible)
     
     def get_statistics(self) -> Dict[str, any]:
         """Get cache statistics and analysis (same interface as SmartDerangementCache)."""
@@ -15,7 +15,7 @@ Algorithm for (5,6) → (6,6):
 import time
 from typing import List, Tuple, Optional
 from core.first_column_enumerator import FirstColumnEnumerator
-from core.smart_derangement_cache import get_smart_derangement_cache
+from core.smart_derangement_cache import get_smart_derangement_cache, get_derangement_sign_lookup
 
 
 def count_rectangles_5_6_with_completion_and_first_column() -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
@@ -46,11 +46,8 @@ def count_rectangles_5_6_with_completion_and_first_column() -> Tuple[Tuple[int,
     cache = get_smart_derangement_cache(n)
     derangements_with_signs = cache.get_all_derangements_with_signs()
     
-    # Create a lookup table for derangement signs
-    derangement_sign_lookup = {}
-    for derang, sign in derangements_with_signs:
-        derang_tuple = tuple(derang.tolist() if hasattr(derang, 'tolist') else derang)
-        derangement_sign_lookup[derang_tuple] = sign
+    # Shared lookup table for derangement signs
+    derangement_sign_lookup = get_derangement_sign_lookup(n)
     
     print(f"   Derangement cache loaded: {len(derangements_with_signs):,} derangements")
     
@@ -11,7 +11,7 @@ For (5,6) -> (6,6): Generate 5-row rectangles, then add the 6th completion row.
 
 import time
 from typing import List, Tuple, Optional
-from core.smart_derangement_cache import get_smart_derangement_cache
+from core.smart_derangement_cache import get_smart_derangement_cache, get_derangement_sign_lookup
 
 
 def count_rectangles_with_completion_bitwise(r: int, n: int) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
@@ -65,11 +65,8 @@ def count_rectangles_with_completion_bitwise(r: int, n: int) -> Tuple[Tuple[int,
     
     first_sign = 1  # Identity permutation
     
-    # Create a lookup table for derangement signs
-    derangement_sign_lookup = {}
-    for derang, sign in derangements_with_signs:
-        derang_tuple = tuple(derang.tolist() if hasattr(derang, 'tolist') else derang)
-        derangement_sign_lookup[derang_tuple] = sign
+    # Shared lookup table for derangement signs
+    derangement_sign_lookup = get_derangement_sign_lookup(n)
     
     # Generate (r,n) rectangles and find their completions
     if r == 2:  # Computing (2,3) and (3,3)
@@ -17,7 +17,7 @@ import time
 from typing import List, Tuple, Optional
 from core.first_column_enumerator import FirstColumnEnumerator
 from core.ultra_safe_bitwise import count_rectangles_ultra_safe_bitwise_constrained
-from core.smart_derangement_cache import get_smart_derangement_cache
+from core.smart_derangement_cache import get_smart_derangement_cache, get_derangement_sign_lookup
 
 
 def count_rectangles_with_completion_and_first_column(r: int, n: int) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
@@ -53,13 +53,9 @@ def count_rectangles_with_completion_and_first_column(r: int, n: int) -> Tuple[T
     
     # Get smart derangement cache for completion row lookup
     cache = get_smart_derangement_cache(n)
-    derangements_with_signs = cache.get_all_derangements_with_signs()
     
-    # Create a lookup table for derangement signs
-    derangement_sign_lookup = {}
-    for derang, sign in derangements_with_signs:
-        derang_tuple = tuple(derang.tolist() if hasattr(derang, 'tolist') else derang)
-        derangement_sign_lookup[derang_tuple] = sign
+    # Shared lookup table for derangement signs
+    derangement_sign_lookup = get_derangement_sign_lookup(n)
     
     # Counters for canonical rectangles (before applying symmetry factor)
     canonical_total_r = 0
@@ -9,6 +9,10 @@ integrating with the existing ultra_safe_bitwise algorithm.
 from typing import List, Tuple, Dict, Set
 import time
 from core.smart_derangement_cache import get_smart_derangement_cache
+from core.ultra_optimized_constrained import (
+    count_rectangles_ultra_optimized_constrained,
+    count_rectangles_ultra_optimized_constrained_completion,
+)
 
 
 class ConstrainedEnumerator:
@@ -42,8 +46,6 @@ class ConstrainedEnumerator:
         self._validate_inputs(r, n, first_column)
         
         # Use our ultra-optimized constrained enumeration
-        from core.ultra_optimized_constrained import count_rectangles_ultra_optimized_constrained
-        
         return count_rectangles_ultra_optimized_constrained(r, n, first_column, cache=cache)
 
     def enumerate_with_fixed_first_column_completion(self, r: int, n: int, 
@@ -71,8 +73,6 @@ class ConstrainedEnumerator:
         self._validate_inputs(r, n, first_column)
         
         # Use our ultra-optimized constrained enumeration with completion
-        from core.ultra_optimized_constrained import count_rectangles_ultra_optimized_constrained_completion
-        
         return count_rectangles_ultra_optimized_constrained_completion(r, n, first_column, cache=cache)
     
     def _filter_derangements_for_first_column(self, cache, first_column: List[int], 
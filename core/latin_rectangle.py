@@ -197,75 +197,87 @@ def generate_normalized_rectangles_bitset_optimized(r: int, n: int, start_counte
     
     def get_cache_key(constraints: BitsetConstraints) -> tuple:
         """Create a hashable cache key from bitset constraints."""
-        return tuple(constraints.forbidden)
+        return constraints.fingerprint()
     
-    def get_valid_permutations_cached(constraints: BitsetConstraints) -> List[List[int]]:
-        """Get all valid permutations for given constraints, with optional caching."""
+    def get_valid_permutations_cached(constraints: BitsetConstraints, with_row_bits: bool) -> list:
+        """
+        Get all valid permutations for given constraints, with optional caching.
+        
+        Returns [permutations, row bits], where row bits (only built when
+        requested) hold each permutation's push_row/pop_row masks.
+        """
         if not use_cache:
             # For small problems, don't use cache to avoid overhead
             # Use optimized generator that produces lexicographic order directly
-            return list(generate_constrained_permutations_bitset_optimized(n, constraints))
+            valid_perms = list(generate_constrained_permutations_bitset_optimized(n, constraints))
+            return [valid_perms, row_bits_for(valid_perms) if with_row_bits else None]
         
         cache_key = get_cache_key(constraints)
         
-        if cache_key not in permutation_cache:
+        entry = permutation_cache.get(cache_key)
+        if entry is None:
             # Generate permutations in lexicographic order directly (no sorting needed)
             valid_perms = list(generate_constrained_permutations_bitset_optimized(n, constraints))
-            permutation_cache[cache_key] = valid_perms  # Already in lexicographic order
+            entry = permutation_cache[cache_key] = [valid_perms, None]  # Already in lexicographic order
+        if with_row_bits and entry[1] is None:
+            entry[1] = row_bits_for(entry[0])
         
-        return permutation_cache[cache_key]
+        return entry
     
-    def generate_from_counters(partial_rows: List[List[int]], level: int, 
-                             constraints: BitsetConstraints, current_counters: List[int]) -> Iterator[LatinRectangle]:
-        """Generate rectangles starting from specified counter positions."""
-        
-        if level == r:
-            # Base case: complete rectangle
-            yield LatinRectangle(r, n, [row[:] for row in partial_rows])  # Faster list copy
-            return
-        
-        # Get valid permutations for this level (cached with bitset constraints)
-        valid_perms = get_valid_permutations_cached(constraints)
-        
-        if not valid_perms:
-            # No valid permutations possible - dead end
-            return
-        
-        # Start from the specified counter for this level
-        start_idx = current_counters[level] if level < len(current_counters) else 0
-        
-        # Ensure start_idx is valid
-        if start_idx >= len(valid_perms):
-            return  # Counter is beyond available permutations
-        
-        for i, perm in enumerate(valid_perms[start_idx:], start_idx):
-            # Add this row to partial rectangle
-            partial_rows.append(perm)
-            
-            # Update bitset constraints by adding values from this row
-            constraints.add_row_constraints(perm)
-            
-            # Prepare counters for next level
-            if i == start_idx:
-                # First iteration - use existing deeper counters
-                next_counters = current_counters
-            else:
-                # Subsequent iterations - reset deeper counters
-                next_counters = current_counters[:level+1] + [0] * (r - level - 1)
-                next_counters[level] = i
-            
-            yield from generate_from_counters(partial_rows, level + 1, constraints, next_counters)
-            
-            # Backtrack: remove this row and its constraints
-            partial_rows.pop()
-            constraints.remove_row_constraints(perm)
+    def row_bits_for(perms: List[List[int]]) -> List[tuple]:
+        """Single-bit masks of each permutation's values, one per column."""
+        return [tuple(1 << (value - 1) for value in perm) for perm in perms]
     
     # Start with identity first row and initial bitset constraints
     first_row = list(range(1, n + 1))
-    initial_constraints = BitsetConstraints(n)
-    initial_constraints.add_row_constraints(first_row)
-    
-    yield from generate_from_counters([first_row], 1, initial_constraints, counters)
+    if r == 1:
+        yield LatinRectangle(r, n, [first_row])
+        return
+
+    constraints = BitsetConstraints(n)
+    constraints.add_row_constraints(first_row)
+    partial_rows = [first_row]
+    placed_row_bits = []
+
+    # Iterative DFS: stack[i] is [valid permutations, row bits, next index]
+    # for row i+1. A frame's row stays in partial_rows (and constraints) until
+    # the frame advances, so each step first backtracks whatever row it placed
+    # last. Last-row permutations complete a rectangle directly and are never
+    # placed. Start counters apply only until the first backtrack; every later
+    # subtree starts from 0 at all deeper levels.
+    def new_frame(level: int, start: int) -> list:
+        valid_perms, row_bits = get_valid_permutations_cached(constraints, level + 1 < r)
+        return [valid_perms, row_bits, start]
+
+    stack = [new_frame(1, counters[1])]
+    resuming = True
+
+    while stack:
+        frame = stack[-1]
+        level = len(stack)
+        if len(partial_rows) > level:
+            partial_rows.pop()
+            constraints.pop_row(placed_row_bits.pop())
+            resuming = False
+
+        valid_perms, row_bits, i = frame
+        if i >= len(valid_perms):
+            # Level exhausted (or counter beyond available permutations)
+            stack.pop()
+            continue
+        frame[2] = i + 1
+
+        perm = valid_perms[i]
+        if level + 1 == r:
+            # Complete rectangle
+            rows = [row[:] for row in partial_rows]  # Faster list copy
+            rows.append(perm[:])
+            yield LatinRectangle(r, n, rows)
+        else:
+            partial_rows.append(perm)
+            placed_row_bits.append(row_bits[i])
+            constraints.push_row(row_bits[i])
+            stack.append(new_frame(level + 1, counters[level + 1] if resuming else 0))
 
 
 def generate_normalized_rectangles_counter_based(r: int, n: int, start_counters: List[int] = None) -> Iterator[LatinRectangle]:
@@ -6,15 +6,120 @@ by partitioning work across first-column choices for enhanced performance.
 """
 
 import multiprocessing as mp
-from typing import List, Tuple, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+import os
+import sys
+from typing import List, Optional, Sequence, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 import time
 
-from core.smart_derangement_cache import get_smart_derangements_with_signs, SmartDerangementCache
+from core.smart_derangement_cache import get_smart_derangement_cache, get_smart_derangements_with_signs, SmartDerangementCache
 from core.counter import CountResult
 from core.first_column_enumerator import FirstColumnEnumerator
 from core.constrained_enumerator import ConstrainedEnumerator
 from core.symmetry_calculator import SymmetryCalculator
+from core.ultra_optimized_constrained import popcount, _build_completion_sign_masks
+
+
+# A row-conflict table holds one num_derangements-bit mask per derangement,
+# i.e. D^2 bits in total: ~27MB for n=8 but ~2GB for n=9. Above this limit
+# the per-position conflict chain is evaluated on the fly instead.
+_ROW_CONFLICT_TABLE_LIMIT = 20000
+
+# Modules a forkserver imports once so its workers start with them loaded
+_WORKER_PRELOAD_MODULES = [
+    "core.smart_derangement_cache",
+    "core.bitset_constraints",
+    "core.ultra_optimized_constrained",
+    "core.parallel_ultra_bitwise",
+]
+
+# Second-row tasks per worker for count_rectangles_parallel_ultra_bitwise; many
+# small tasks let idle workers pull more instead of waiting on a slow partition
+_TASKS_PER_PROCESS = 32
+
+# Shared by every driver and worker; (r-1)! is memoized inside the calculator
+_symmetry_calculator = SymmetryCalculator()
+
+
+def default_num_processes() -> int:
+    """
+    Number of worker processes to use when the caller does not specify one.
+    
+    Uses every CPU this process may run on (its affinity set, so container
+    CPU limits are respected). The PARALLEL_MAX_WORKERS environment variable
+    overrides this when set to a positive integer.
+    """
+    override = os.environ.get("PARALLEL_MAX_WORKERS")
+    if override:
+        try:
+            workers = int(override)
+        except ValueError:
+            raise ValueError(f"PARALLEL_MAX_WORKERS must be a positive integer, got {override!r}")
+        if workers <= 0:
+            raise ValueError(f"PARALLEL_MAX_WORKERS must be a positive integer, got {override!r}")
+        return workers
+    
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return mp.cpu_count()
+
+
+def _pool_context():
+    """
+    Choose the multiprocessing start method for worker pools.
+    
+    On Linux, fork lets workers inherit the parent's imported modules and any
+    derangement cache it already loaded. This is pinned explicitly because
+    Python 3.14 changes the default. Elsewhere, fork is unsafe or unavailable.
+    There, a forkserver preloads the core modules once instead of every
+    spawned worker re-importing them. Windows falls back to spawn.
+    """
+    start_methods = mp.get_all_start_methods()
+    if sys.platform.startswith("linux") and "fork" in start_methods:
+        return mp.get_context("fork")
+    if "forkserver" in start_methods:
+        context = mp.get_context("forkserver")
+        context.set_forkserver_preload(_WORKER_PRELOAD_MODULES)
+        return context
+    return mp.get_context("spawn")
+
+
+def _preload_for_fork(context, n: int, partition_tables: bool = False) -> None:
+    """
+    Load the derangement cache in the parent before a fork-based pool starts.
+    
+    Forked workers then inherit the loaded cache instead of each reading it
+    from disk; other start methods load it in the worker as before. With
+    partition_tables, the second-row partition tables are built here too.
+    """
+    if context.get_start_method() == "fork":
+        get_smart_derangement_cache(n)
+        if partition_tables:
+            _get_partition_tables(n)
+
+
+def _build_row_conflict_masks(derangements_with_signs, conflict_table: List[List[int]]) -> Optional[List[int]]:
+    """
+    Combine each derangement's per-position conflict masks into one mask.
+    
+    With the table, the valid mask for the row below derangement i is
+    ``valid & ~row_conflicts[i]`` instead of n separate AND operations.
+    
+    Returns:
+        List of combined conflict masks indexed by derangement, or None when
+        the table would exceed _ROW_CONFLICT_TABLE_LIMIT derangements
+    """
+    if len(derangements_with_signs) > _ROW_CONFLICT_TABLE_LIMIT:
+        return None
+    
+    row_conflicts = []
+    for row, _ in derangements_with_signs:
+        combined = 0
+        for position_masks, value in zip(conflict_table, row):
+            combined |= position_masks[value]
+        row_conflicts.append(combined)
+    return row_conflicts
 
 
 def count_rectangles_first_column_sequential(r: int, n: int) -> Tuple[int, int, int]:
@@ -30,8 +135,10 @@ def count_rectangles_first_column_sequential(r: int, n: int) -> Tuple[int, int,
     # Generate first column choices
     enumerator = FirstColumnEnumerator()
     first_columns = enumerator.enumerate_first_columns(r, n)
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
+    
+    # One constrained enumerator serves every first column
+    constrained_enumerator = ConstrainedEnumerator()
     
     total_count = 0
     positive_count = 0
@@ -39,19 +146,15 @@ def count_rectangles_first_column_sequential(r: int, n: int) -> Tuple[int, int,
     
     # Process each first column choice sequentially
     for first_column in first_columns:
-        # Use the constrained enumerator for this first column
-        from core.constrained_enumerator import ConstrainedEnumerator
-        constrained_enumerator = ConstrainedEnumerator()
-        
         pos, neg = constrained_enumerator.enumerate_with_fixed_first_column(r, n, first_column)
         
-        # Apply symmetry factor
-        pos_with_symmetry = pos * symmetry_factor
-        neg_with_symmetry = neg * symmetry_factor
-        
-        total_count += pos_with_symmetry + neg_with_symmetry
-        positive_count += pos_with_symmetry
-        negative_count += neg_with_symmetry
+        positive_count += pos
+        negative_count += neg
+    
+    # Every first column stands for symmetry_factor rectangles; scale once
+    positive_count *= symmetry_factor
+    negative_count *= symmetry_factor
+    total_count = positive_count + negative_count
     
     return total_count, positive_count, negative_count
 
@@ -79,11 +182,9 @@ def count_rectangles_first_column_worker(r: int, n: int,
     # Generate all first column choices (same in each process)
     enumerator = FirstColumnEnumerator()
     all_first_columns = enumerator.enumerate_first_columns(r, n)
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
     
     # Initialize constrained enumerator
-    from core.constrained_enumerator import ConstrainedEnumerator
     constrained_enumerator = ConstrainedEnumerator()
     
     total_count = 0
@@ -97,200 +198,288 @@ def count_rectangles_first_column_worker(r: int, n: int,
         # Count rectangles for this first column choice
         pos, neg = constrained_enumerator.enumerate_with_fixed_first_column(r, n, first_column)
         
-        # Apply symmetry factor
-        pos_with_symmetry = pos * symmetry_factor
-        neg_with_symmetry = neg * symmetry_factor
-        
-        total_count += pos_with_symmetry + neg_with_symmetry
-        positive_count += pos_with_symmetry
-        negative_count += neg_with_symmetry
+        positive_count += pos
+        negative_count += neg
+    
+    # Every first column stands for symmetry_factor rectangles; scale once
+    positive_count *= symmetry_factor
+    negative_count *= symmetry_factor
+    total_count = positive_count + negative_count
     
     elapsed_time = time.time() - start_time
     return total_count, positive_count, negative_count, elapsed_time
 
 
-def count_rectangles_ultra_bitwise_partition(r: int, n: int, 
-                                             second_row_indices: List[int],
-                                             process_id: int = 0,
-                                             logger_session: str = None) -> Tuple[int, int, int, float]:
+_partition_tables = {}
+
+
+def _get_partition_tables(n: int) -> tuple:
     """
-    Count rectangles for a partition of second rows using ultra-safe bitwise.
-    
-    This function processes a subset of second-row derangements and counts
-    all rectangles that start with those second rows.
-    
-    Args:
-        r: Number of rows
-        n: Number of columns
-        second_row_indices: List of indices into the derangements array
-        
-    Returns:
-        Tuple of (total_count, positive_count, negative_count, elapsed_time)
+    Per-process tables for count_rectangles_ultra_bitwise_partition, built once per n.
+    
+    Returns (derangement_rows, derangement_signs, conflict_table,
+    all_valid_mask, row_conflict_masks, positive_row_mask, negative_row_mask),
+    where conflict_table[pos][val] is the mask of derangements with val at pos
+    (index 0 unused). Every task a worker runs for the same n reuses them
+    instead of rebuilding the conflict masks; forked workers inherit tables
+    the parent already built.
     """
-    start_time = time.time()
+    if n in _partition_tables:
+        return _partition_tables[n]
     
-    # Set up process-local logger (each process gets its own logger instance)
-    from core.logging_config import ProgressLogger
-    if logger_session:
-        logger = ProgressLogger(f"{logger_session}_process_{process_id}")
-    else:
-        logger = ProgressLogger(f"parallel_{r}_{n}_process_{process_id}")
-    
-    # Register this process for progress tracking
-    total_work = len(second_row_indices)
-    logger.register_process(process_id, total_work, f"Processing {total_work:,} second-row derangements")
-    
-    # Progress tracking
-    last_progress_time = start_time
-    progress_interval = 30  # 30 seconds for production - reasonable progress updates
-    inner_progress_counter = 0  # Track inner loop iterations
-    processed_count = 0
-    
-    # Load smart derangements (cached, so fast)
-    # Use get_smart_derangement_cache to avoid double-loading
-    from core.smart_derangement_cache import get_smart_derangement_cache
     cache = get_smart_derangement_cache(n)
     derangements_with_signs = cache.get_all_derangements_with_signs()
     num_derangements = len(derangements_with_signs)
     
-    # Get position-value index for conflict masks
-    position_value_index = cache.position_value_index
-    
-    conflict_masks = {}
-    for pos in range(n):
-        for val in range(1, n + 1):
-            conflict_key = (pos, val)
-            if conflict_key in position_value_index:
-                mask = 0
-                for conflict_idx in position_value_index[conflict_key]:
-                    mask |= (1 << conflict_idx)
-                conflict_masks[conflict_key] = mask
-            else:
-                conflict_masks[conflict_key] = 0
-    
-    all_valid_mask = (1 << num_derangements) - 1
-    
-    total_count = 0
+    if hasattr(cache, 'get_bitwise_data'):
+        # Binary cache ships pre-computed conflict masks
+        conflict_masks, all_valid_mask = cache.get_bitwise_data()
+    else:
+        # Get position-value index for conflict masks
+        position_value_index = cache.position_value_index
+        
+        conflict_masks = {}
+        for pos in range(n):
+            for val in range(1, n + 1):
+                conflict_key = (pos, val)
+                if conflict_key in position_value_index:
+                    mask = 0
+                    for conflict_idx in position_value_index[conflict_key]:
+                        mask |= (1 << conflict_idx)
+                    conflict_masks[conflict_key] = mask
+                else:
+                    conflict_masks[conflict_key] = 0
+        
+        all_valid_mask = (1 << num_derangements) - 1
+    
+    # Nested lists indexed [pos][val] avoid a tuple key and hash per lookup
+    conflict_table = [
+        [0] + [conflict_masks.get((pos, val), 0) for val in range(1, n + 1)]
+        for pos in range(n)
+    ]
+    
+    # Combined per-row conflicts turn each next-row mask into a single AND
+    row_conflict_masks = _build_row_conflict_masks(derangements_with_signs, conflict_table)
+    
+    # The last row's signs are tallied in bulk: popcount of the valid mask
+    # against the positive/negative derangement masks
+    positive_row_mask, negative_row_mask = _build_completion_sign_masks(cache)
+    
+    # Rows and signs as parallel lists: the search reads a sign per candidate
+    # and only the fallback path needs the row itself
+    derangement_rows = [row for row, _ in derangements_with_signs]
+    derangement_signs = [sign for _, sign in derangements_with_signs]
+    
+    tables = (derangement_rows, derangement_signs, conflict_table, all_valid_mask,
+              row_conflict_masks, positive_row_mask, negative_row_mask)
+    _partition_tables[n] = tables
+    return tables
+
+
+def _count_rows_below_third(r: int, n: int, second_row_indices: List[int],
+                            third_row_valid_mask, process_id: int, logger,
+                            progress_interval: float) -> Tuple[int, int]:
+    """
+    Stack search for r > 3 over the given second rows.
+
+    Args:
+        r: Number of rows (> 3)
+        n: Number of columns
+        second_row_indices: Indices of the second-row derangements to expand
+        third_row_valid_mask: Callable mapping a second-row index to the mask
+            of derangements compatible with it
+        process_id: Process identifier for progress updates
+        logger: ProgressLogger to report through
+        progress_interval: Seconds between progress updates
+
+    Returns:
+        Tuple of (positive_count, negative_count)
+    """
+    (derangement_rows, derangement_signs, conflict_table, _,
+     row_conflict_masks, positive_row_mask, negative_row_mask) = _get_partition_tables(n)
+
     positive_count = 0
     negative_count = 0
-    
+    processed_count = 0
+    inner_progress_counter = 0  # Track inner loop iterations
+    last_progress_time = time.time()
+
     first_sign = 1  # Identity permutation
-    
-    # Process each second row in this partition
+
     for second_idx in second_row_indices:
         processed_count += 1
-        
-        # Log start of processing this second row
-        logger.info(f"🔄 Process {process_id}: Starting second row {processed_count}/{len(second_row_indices)} (index {second_idx})")
-        
-        second_row, second_sign = derangements_with_signs[second_idx]
-        
-        if r == 2:
-            # Just count this one rectangle
-            rectangle_sign = first_sign * second_sign
-            total_count += 1
-            if rectangle_sign > 0:
-                positive_count += 1
-            else:
-                negative_count += 1
-            continue
-        
-        # Calculate valid mask for third row
-        third_row_valid = all_valid_mask
-        for pos in range(n):
-            third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-        
-        if r == 3:
-            # Just iterate through valid third rows
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                _, third_sign = derangements_with_signs[third_idx]
-                
-                rectangle_sign = first_sign * second_sign * third_sign
-                total_count += 1
-                if rectangle_sign > 0:
-                    positive_count += 1
-                else:
-                    negative_count += 1
-            continue
-        
-        # For r > 3, use iterative stack-based approach
-        stack = [(2, third_row_valid, first_sign * second_sign)]
-        
+
+        second_sign = derangement_signs[second_idx]
+        stack = [(2, third_row_valid_mask(second_idx), first_sign * second_sign)]
+
         while stack:
             level, valid_mask, accumulated_sign = stack.pop()
-            
-            # Inner loop progress reporting (every 1000 iterations for production)
+
+            # Inner loop progress reporting: consult the clock only every 4096
+            # iterations and send a single counters-only update per interval
+            # (update_process_progress already writes the log line)
             inner_progress_counter += 1
-            if inner_progress_counter % 1000 == 0:
+            if not inner_progress_counter & 0xFFF:
                 current_time = time.time()
-                if current_time - last_progress_time >= 30:  # Report every 30 seconds for inner loops
-                    logger.info(f"📊 Process {process_id}: Second row {processed_count}/{len(second_row_indices)}, "
-                               f"Inner iterations: {inner_progress_counter:,}, "
-                               f"Stack depth: {len(stack)}, Level: {level}, "
-                               f"Rectangles: {total_count:,}")
+                if current_time - last_progress_time >= progress_interval:
                     logger.update_process_progress(
-                        process_id, 
+                        process_id,
                         processed_count,
                         {
-                            "rectangles_found": total_count,
+                            "rectangles_found": positive_count + negative_count,
                             "positive_count": positive_count,
                             "negative_count": negative_count,
-                            "inner_iterations": inner_progress_counter,
-                            "current_second_row": f"{processed_count}/{len(second_row_indices)}",
-                            "stack_depth": len(stack),
-                            "current_level": level
+                            "inner_iterations": inner_progress_counter
                         }
                     )
                     last_progress_time = current_time
-            
+
             if level == r - 1:
-                # Last row - count all valid completions
-                last_mask = valid_mask
-                while last_mask:
-                    last_idx = (last_mask & -last_mask).bit_length() - 1
-                    last_mask &= last_mask - 1
-                    _, last_sign = derangements_with_signs[last_idx]
-                    
-                    rectangle_sign = accumulated_sign * last_sign
-                    total_count += 1
-                    if rectangle_sign > 0:
-                        positive_count += 1
-                    else:
-                        negative_count += 1
+                # Last row - count all valid completions by sign
+                same_sign = popcount(valid_mask & positive_row_mask)
+                opposite_sign = popcount(valid_mask & negative_row_mask)
+                if accumulated_sign > 0:
+                    positive_count += same_sign
+                    negative_count += opposite_sign
+                else:
+                    positive_count += opposite_sign
+                    negative_count += same_sign
             else:
-                # Not the last row - iterate and push to stack
-                current_mask = valid_mask
-                while current_mask:
-                    current_idx = (current_mask & -current_mask).bit_length() - 1
-                    current_mask &= current_mask - 1
-                    current_row, current_sign = derangements_with_signs[current_idx]
-                    
+                # Not the last row - iterate and push to stack. Every row still
+                # to be placed must come from next_valid and be distinct, so a
+                # subtree needs at least rows_needed candidates to yield anything.
+                rows_needed = r - 1 - level
+                # Walk set bits by scanning the mask's binary string: one
+                # O(W) conversion instead of two big-int allocations
+                # (m & -m, m & (m - 1)) per candidate
+                bits = bin(valid_mask)
+                top_bit = len(bits) - 1
+                bit_pos = bits.find('1', 2)
+                while bit_pos != -1:
+                    current_idx = top_bit - bit_pos
+                    bit_pos = bits.find('1', bit_pos + 1)
+
                     # Calculate valid mask for next row
-                    next_valid = valid_mask
-                    for pos in range(n):
-                        next_valid &= ~conflict_masks[(pos, current_row[pos])]
-                    
-                    if next_valid != 0:
-                        new_accumulated_sign = accumulated_sign * current_sign
+                    if row_conflict_masks is not None:
+                        next_valid = valid_mask & ~row_conflict_masks[current_idx]
+                    else:
+                        next_valid = valid_mask
+                        for position_masks, value in zip(conflict_table, derangement_rows[current_idx]):
+                            next_valid &= ~position_masks[value]
+
+                    if popcount(next_valid) >= rows_needed:
+                        new_accumulated_sign = accumulated_sign * derangement_signs[current_idx]
                         stack.append((level + 1, next_valid, new_accumulated_sign))
-        
+
         # Update progress after completing this second row (outer loop progress)
         current_time = time.time()
         if current_time - last_progress_time >= progress_interval:
             logger.update_process_progress(
-                process_id, 
+                process_id,
                 processed_count,
                 {
-                    "rectangles_found": total_count,
+                    "rectangles_found": positive_count + negative_count,
                     "positive_count": positive_count,
                     "negative_count": negative_count
                 }
             )
             last_progress_time = current_time
+
+    return positive_count, negative_count
+
+
+def count_rectangles_ultra_bitwise_partition(r: int, n: int, 
+                                             second_row_indices: List[int],
+                                             process_id: int = 0,
+                                             logger_session: str = None,
+                                             logger=None) -> Tuple[int, int, int, float]:
+    """
+    Count rectangles for a partition of second rows using ultra-safe bitwise.
+    
+    This function processes a subset of second-row derangements and counts
+    all rectangles that start with those second rows.
+    
+    Args:
+        r: Number of rows
+        n: Number of columns
+        second_row_indices: List of indices into the derangements array
+        process_id: Process identifier
+        logger_session: Session name for logging
+        logger: Existing ProgressLogger to report through (None = create one
+            for this call from logger_session and process_id)
+        
+    Returns:
+        Tuple of (total_count, positive_count, negative_count, elapsed_time)
+    """
+    start_time = time.time()
+    
+    # Set up process-local logger (each process gets its own logger instance)
+    if logger is None:
+        from core.logging_config import ProgressLogger
+        if logger_session:
+            logger = ProgressLogger(f"{logger_session}_process_{process_id}")
+        else:
+            logger = ProgressLogger(f"parallel_{r}_{n}_process_{process_id}")
     
+    # Register this process for progress tracking
+    total_work = len(second_row_indices)
+    logger.register_process(process_id, total_work, f"Processing {total_work:,} second-row derangements")
+    
+    # Progress tracking
+    progress_interval = 30  # 30 seconds for production - reasonable progress updates
+    processed_count = 0
+    
+    # Derangement tables and masks are built once per process and n
+    (derangement_rows, derangement_signs, conflict_table, all_valid_mask,
+     row_conflict_masks, positive_row_mask, negative_row_mask) = _get_partition_tables(n)
+    
+    total_count = 0
+    positive_count = 0
+    negative_count = 0
+    
+    first_sign = 1  # Identity permutation
+    
+    def third_row_valid_mask(second_idx: int) -> int:
+        """Mask of derangements compatible with the given second row."""
+        if row_conflict_masks is not None:
+            return all_valid_mask & ~row_conflict_masks[second_idx]
+        valid_mask = all_valid_mask
+        for position_masks, value in zip(conflict_table, derangement_rows[second_idx]):
+            valid_mask &= ~position_masks[value]
+        return valid_mask
+    
+    # r is fixed for the whole partition, so dispatch once and give r=2 and
+    # r=3 their own branch-free loops instead of testing r per second row
+    if r == 2:
+        # Each second row is exactly one rectangle carrying its own sign
+        for second_idx in second_row_indices:
+            if first_sign * derangement_signs[second_idx] > 0:
+                positive_count += 1
+            else:
+                negative_count += 1
+        processed_count = len(second_row_indices)
+        total_count = positive_count + negative_count
+    elif r == 3:
+        # Count valid third rows by sign; no deeper rows to enumerate
+        for second_idx in second_row_indices:
+            third_row_valid = third_row_valid_mask(second_idx)
+            same_sign = popcount(third_row_valid & positive_row_mask)
+            opposite_sign = popcount(third_row_valid & negative_row_mask)
+            if first_sign * derangement_signs[second_idx] > 0:
+                positive_count += same_sign
+                negative_count += opposite_sign
+            else:
+                positive_count += opposite_sign
+                negative_count += same_sign
+        processed_count = len(second_row_indices)
+        total_count = positive_count + negative_count
+    else:
+        positive_count, negative_count = _count_rows_below_third(
+            r, n, second_row_indices, third_row_valid_mask,
+            process_id, logger, progress_interval)
+        processed_count = len(second_row_indices)
+        total_count = positive_count + negative_count
+
     elapsed_time = time.time() - start_time
     
     # Final progress update
@@ -309,7 +498,7 @@ def count_rectangles_ultra_bitwise_partition(r: int, n: int,
 
 
 def count_rectangles_first_column_partition(r: int, n: int, 
-                                           first_columns: List[List[int]],
+                                           first_column_indices: Sequence[int],
                                            process_id: int = 0,
                                            logger_session: Optional[str] = None) -> Tuple[int, int, int, float]:
     """
@@ -317,11 +506,13 @@ def count_rectangles_first_column_partition(r: int, n: int,
     
     This distributes first-column choices across processes for realistic
     parallel speedups while maintaining the first-column optimization benefits.
+    The enumeration is deterministic, so each worker rebuilds it and only the
+    indices (typically a range) cross the process boundary.
     
     Args:
         r: Number of rows
         n: Number of columns
-        first_columns: List of first-column choices to process
+        first_column_indices: Indices into enumerate_first_columns(r, n) to process
         process_id: Process identifier
         logger_session: Session name for logging
         
@@ -338,55 +529,51 @@ def count_rectangles_first_column_partition(r: int, n: int,
         logger = ProgressLogger(f"parallel_{r}_{n}_process_{process_id}")  # Use parallel_ prefix for consistency
     
     # Register this process for progress tracking
-    total_work = len(first_columns)
+    total_work = len(first_column_indices)
     logger.register_process(process_id, total_work, f"Processing {total_work:,} first-column choices")
     
+    all_first_columns = FirstColumnEnumerator().enumerate_first_columns(r, n)
+    
     # Initialize constrained enumerator and symmetry calculator
-    from core.constrained_enumerator import ConstrainedEnumerator
     constrained_enumerator = ConstrainedEnumerator()
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
     
     total_count = 0
     positive_count = 0
     negative_count = 0
     processed_count = 0
     
-    # Progress tracking with time-based updates
-    last_progress_time = start_time
-    progress_interval = 30  # 30 seconds for production - reasonable progress updates
-    
     # Process each first column choice in this partition
-    for first_column in first_columns:
+    for idx in first_column_indices:
+        first_column = all_first_columns[idx]
         processed_count += 1
         
-        logger.info(f"🔄 Process {process_id}: Starting first-column choice {processed_count}/{total_work}")
-        
         # Count rectangles for this first column choice
         pos, neg = constrained_enumerator.enumerate_with_fixed_first_column(r, n, first_column)
         
-        # Apply symmetry factor
-        pos_with_symmetry = pos * symmetry_factor
-        neg_with_symmetry = neg * symmetry_factor
-        
-        total_count += pos_with_symmetry + neg_with_symmetry
-        positive_count += pos_with_symmetry
-        negative_count += neg_with_symmetry
+        positive_count += pos
+        negative_count += neg
         
-        logger.info(f"✅ Process {process_id}: Completed first-column choice {processed_count}/{total_work} - "
-                   f"{pos_with_symmetry + neg_with_symmetry:,} rectangles (+{pos_with_symmetry:,} -{neg_with_symmetry:,})")
+        # Per-choice reports carry unscaled counts (one per symmetry class);
+        # %-style arguments defer formatting to the handlers that emit it
+        logger.logger.info("✅ Process %d: Completed first-column choice %d/%d - %d unscaled rectangles (+%d -%d)",
+                           process_id, processed_count, total_work, pos + neg, pos, neg)
         
         # Always update progress after each first-column choice (for long-running computations)
         logger.update_process_progress(
             process_id, 
             processed_count,
             {
-                "rectangles_found": total_count,
+                "rectangles_found": positive_count + negative_count,
                 "positive_count": positive_count,
                 "negative_count": negative_count
             }
         )
-        last_progress_time = time.time()
+    
+    # Every first column stands for symmetry_factor rectangles; scale once
+    positive_count *= symmetry_factor
+    negative_count *= symmetry_factor
+    total_count = positive_count + negative_count
     
     elapsed_time = time.time() - start_time
     
@@ -437,21 +624,17 @@ def count_rectangles_parallel_first_column(r: int, n: int,
     
     # Auto-detect optimal process count
     if num_processes is None:
-        num_processes = min(mp.cpu_count(), 8)
+        num_processes = default_num_processes()
     
     logger.info(f"🚀 Using parallel first column optimization with {num_processes} processes")
-    print(f"🚀 Using parallel first column optimization with {num_processes} processes")
     
     # Generate first column choices
     enumerator = FirstColumnEnumerator()
     first_columns = enumerator.enumerate_first_columns(r, n)
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
     
     logger.info(f"   📊 Total first-column choices: {len(first_columns):,}")
     logger.info(f"   🔢 Symmetry factor: {symmetry_factor} (each choice represents {symmetry_factor} rectangles)")
-    print(f"   📊 Total first-column choices: {len(first_columns):,}")
-    print(f"   🔢 Symmetry factor: {symmetry_factor} (each choice represents {symmetry_factor} rectangles)")
     
     # Create balanced work partitions by distributing first column choices
     # Use round-robin distribution for better load balancing
@@ -462,17 +645,13 @@ def count_rectangles_parallel_first_column(r: int, n: int,
     if num_processes <= 0:
         num_processes = 1
     
-    partitions = [[] for _ in range(num_processes)]
-    
-    # Distribute first columns in round-robin fashion for balanced load
-    for i, first_column in enumerate(first_columns):
-        process_idx = i % num_processes
-        partitions[process_idx].append(first_column)
+    # Distribute first columns in round-robin fashion for balanced load; each
+    # partition is a strided range of indices, so it pickles as three ints
+    partitions = [range(i, len(first_columns), num_processes) for i in range(num_processes)]
     
     # Log the distribution
-    for i, partition_choices in enumerate(partitions):
-        logger.info(f"   Process {i+1}: {len(partition_choices):,} first column choices")
-        print(f"   Process {i+1}: {len(partition_choices):,} first column choices")
+    for i, partition_indices in enumerate(partitions):
+        logger.info(f"   Process {i+1}: {len(partition_indices):,} first column choices")
     
     # Initialize counts
     total_count = 0
@@ -480,28 +659,30 @@ def count_rectangles_parallel_first_column(r: int, n: int,
     negative_count = 0
     
     # Execute in parallel
-    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+    # Shared counter handing each new worker its CPU slot
+    context = _pool_context()
+    _preload_for_fork(context, n)
+    worker_counter = context.Value('i', 0)
+    with ProcessPoolExecutor(max_workers=num_processes,
+                             mp_context=context,
+                             initializer=_pin_worker_to_cpu,
+                             initargs=(worker_counter,)) as executor:
         # Submit all tasks
-        futures = []
-        for i, partition_choices in enumerate(partitions):
+        future_to_process = {}
+        for i, partition_indices in enumerate(partitions):
             future = executor.submit(
                 count_rectangles_first_column_partition,
-                r, n, partition_choices, i, logger_session
+                r, n, partition_indices, i, logger_session
             )
-            futures.append((i, future))
+            future_to_process[future] = i
         
-        # Collect results as they complete
+        # Collect results as they complete; times are indexed by process id
         completed = 0
-        process_results = {}
+        process_times = [None] * num_processes
         
-        for future in as_completed([f for _, f in futures]):
+        for future in as_completed(future_to_process):
             try:
-                # Find which process this future belongs to
-                process_id = None
-                for i, (pid, fut) in enumerate(futures):
-                    if fut == future:
-                        process_id = pid
-                        break
+                process_id = future_to_process[future]
                 
                 part_total, part_positive, part_negative, part_time = future.result()
                 total_count += part_total
@@ -509,26 +690,16 @@ def count_rectangles_parallel_first_column(r: int, n: int,
                 negative_count += part_negative
                 
                 completed += 1
-                process_results[process_id] = {
-                    'total': part_total,
-                    'positive': part_positive,
-                    'negative': part_negative,
-                    'time': part_time
-                }
+                process_times[process_id] = part_time
                 
-                # Show per-process completion
+                # One combined line per completion
                 rate = part_total / part_time if part_time > 0 else 0
-                logger.info(f"✅ Process {process_id+1}/{num_processes}: {part_total:,} rectangles in {part_time:.2f}s ({rate:,.0f} rect/s)")
-                print(f"✅ Process {process_id+1}/{num_processes}: {part_total:,} rectangles in {part_time:.2f}s ({rate:,.0f} rect/s)")
-                
-                # Show overall progress
-                progress_pct = (completed / num_processes) * 100
-                elapsed_time = time.time() - start_time
-                logger.info(f"📊 Progress: {completed}/{num_processes} ({progress_pct:.0f}%) - {total_count:,} total - {elapsed_time:.1f}s elapsed")
-                print(f"📊 Progress: {completed}/{num_processes} ({progress_pct:.0f}%) - {total_count:,} total")
+                line = (f"✅ Process {process_id+1}/{num_processes}: {part_total:,} rectangles "
+                        f"in {part_time:.2f}s ({rate:,.0f} rect/s) [{completed}/{num_processes} done]")
+                logger.info(line)
                 
             except Exception as e:
-                print(f"❌ Process failed: {e}")
+                logger.error(f"❌ Process failed: {e}")
                 import traceback
                 traceback.print_exc()
     
@@ -541,20 +712,13 @@ def count_rectangles_parallel_first_column(r: int, n: int,
     logger.info(f"   Result: +{positive_count:,} -{negative_count:,}")
     logger.info(f"   Overall rate: {total_count/computation_time:,.0f} rect/s")
     
-    print(f"\n✅ PARALLEL FIRST COLUMN OPTIMIZATION COMPLETE!")
-    print(f"   Total time: {computation_time:.2f}s")
-    print(f"   Total rectangles: {total_count:,}")
-    print(f"   Result: +{positive_count:,} -{negative_count:,}")
-    print(f"   Overall rate: {total_count/computation_time:,.0f} rect/s")
-    
-    if process_results:
-        avg_time = sum(r['time'] for r in process_results.values()) / len(process_results)
+    finished_times = [t for t in process_times if t is not None]
+    if finished_times:
+        avg_time = sum(finished_times) / len(finished_times)
         speedup = avg_time / computation_time if computation_time > 0 else 0
         efficiency = speedup / num_processes * 100 if num_processes > 0 else 0
         logger.info(f"   Parallel speedup: {speedup:.2f}x")
         logger.info(f"   Parallel efficiency: {efficiency:.1f}%")
-        print(f"   Parallel speedup: {speedup:.2f}x")
-        print(f"   Parallel efficiency: {efficiency:.1f}%")
     
     # Close the logger session
     logger.close_session()
@@ -603,10 +767,8 @@ def count_rectangles_first_column_partition_with_completion(r: int, n: int,
     logger.register_process(process_id, total_work, f"Processing {total_work:,} first-column choices with completion")
     
     # Initialize constrained enumerator and symmetry calculator
-    from core.constrained_enumerator import ConstrainedEnumerator
     constrained_enumerator = ConstrainedEnumerator()
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
     
     # Counters for (r, n)
     total_r = 0
@@ -620,6 +782,10 @@ def count_rectangles_first_column_partition_with_completion(r: int, n: int,
     
     processed_count = 0
     
+    # Progress tracking with time-based updates
+    last_progress_time = start_time
+    progress_interval = 30  # 30 seconds for production - reasonable progress updates
+    
     # Process each first column choice in this partition
     for first_column in first_columns:
         processed_count += 1
@@ -627,28 +793,23 @@ def count_rectangles_first_column_partition_with_completion(r: int, n: int,
         # Count rectangles for this first column choice with completion
         pos_r, neg_r, pos_r_plus_1, neg_r_plus_1 = constrained_enumerator.enumerate_with_fixed_first_column_completion(r, n, first_column)
         
-        # Apply symmetry factor
-        pos_r_with_symmetry = pos_r * symmetry_factor
-        neg_r_with_symmetry = neg_r * symmetry_factor
-        pos_r_plus_1_with_symmetry = pos_r_plus_1 * symmetry_factor
-        neg_r_plus_1_with_symmetry = neg_r_plus_1 * symmetry_factor
-        
-        total_r += pos_r_with_symmetry + neg_r_with_symmetry
-        positive_r += pos_r_with_symmetry
-        negative_r += neg_r_with_symmetry
-        
-        total_r_plus_1 += pos_r_plus_1_with_symmetry + neg_r_plus_1_with_symmetry
-        positive_r_plus_1 += pos_r_plus_1_with_symmetry
-        negative_r_plus_1 += neg_r_plus_1_with_symmetry
+        # Accumulate unscaled; the symmetry factor is applied once below
+        positive_r += pos_r
+        negative_r += neg_r
+        positive_r_plus_1 += pos_r_plus_1
+        negative_r_plus_1 += neg_r_plus_1
         
-        # Update progress periodically
-        if processed_count % 10 == 0 or processed_count == total_work:
+        # Update progress on elapsed time with unscaled counts; the final,
+        # scaled update follows the loop
+        current_time = time.time()
+        if current_time - last_progress_time >= progress_interval:
+            last_progress_time = current_time
             logger.update_process_progress(
                 process_id, 
                 processed_count,
                 {
-                    "rectangles_r_found": total_r,
-                    "rectangles_r_plus_1_found": total_r_plus_1,
+                    "rectangles_r_found": positive_r + negative_r,
+                    "rectangles_r_plus_1_found": positive_r_plus_1 + negative_r_plus_1,
                     "positive_r_count": positive_r,
                     "negative_r_count": negative_r,
                     "positive_r_plus_1_count": positive_r_plus_1,
@@ -656,6 +817,14 @@ def count_rectangles_first_column_partition_with_completion(r: int, n: int,
                 }
             )
     
+    # Every first column stands for symmetry_factor rectangles; scale once
+    positive_r *= symmetry_factor
+    negative_r *= symmetry_factor
+    positive_r_plus_1 *= symmetry_factor
+    negative_r_plus_1 *= symmetry_factor
+    total_r = positive_r + negative_r
+    total_r_plus_1 = positive_r_plus_1 + negative_r_plus_1
+    
     elapsed_time = time.time() - start_time
     
     # Final progress update
@@ -676,6 +845,134 @@ def count_rectangles_first_column_partition_with_completion(r: int, n: int,
     return total_r, positive_r, negative_r, total_r_plus_1, positive_r_plus_1, negative_r_plus_1, elapsed_time
 
 
+def _pin_workers_enabled() -> bool:
+    """Whether PARALLEL_PIN_WORKERS asks for workers to be pinned to CPUs."""
+    return os.environ.get("PARALLEL_PIN_WORKERS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _pin_worker_to_cpu(worker_counter) -> None:
+    """
+    Pin this worker process to one CPU, round-robin over the allowed set.
+    
+    Keeps each worker's cache-resident tables on one core instead of letting
+    the scheduler migrate it. Opt-in via PARALLEL_PIN_WORKERS: every pool
+    counts from the first allowed CPU, so concurrent pools would pile onto
+    the same cores. No-op where sched_setaffinity is unavailable.
+    """
+    if not _pin_workers_enabled() or not hasattr(os, 'sched_setaffinity'):
+        return
+    
+    _pin_to_cpu_slot(_claim_worker_index(worker_counter))
+
+
+def _claim_worker_index(worker_counter) -> int:
+    """Take the next worker index (0, 1, ...) from a pool's shared counter."""
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    return worker_index
+
+
+def _pin_to_cpu_slot(worker_index: int) -> None:
+    """Pin this process to the worker_index-th allowed CPU (round-robin)."""
+    allowed_cpus = sorted(os.sched_getaffinity(0))
+    try:
+        os.sched_setaffinity(0, {allowed_cpus[worker_index % len(allowed_cpus)]})
+    except OSError:
+        pass  # Affinity is an optimization; run unpinned if refused
+
+
+def _init_completion_worker(n: int, worker_counter=None) -> None:
+    """
+    Pool initializer: pin the worker if enabled and load the derangement cache once.
+    
+    Workers are long-lived and the cache is a per-process singleton, so every
+    first-column task after this reuses it instead of paying the load (and,
+    for the binary cache, the conflict-mask build) inside its own timing.
+    """
+    if worker_counter is not None:
+        _pin_worker_to_cpu(worker_counter)
+    
+    get_smart_derangement_cache(n)
+
+
+# Per-worker state set by _init_partition_worker: (worker_index, ProgressLogger)
+_partition_worker = None
+
+
+def _init_partition_worker(r: int, n: int, logger_session: str, worker_counter) -> None:
+    """
+    Pool initializer: set up one logger per worker and build its tables once.
+    
+    The worker takes the next index from worker_counter, so its log files are
+    {logger_session}_process_{index} however many tasks it runs, and pins to
+    that CPU slot if enabled. Every second-row task then reuses the tables;
+    under fork they are usually inherited from the parent already.
+    """
+    global _partition_worker
+    from core.logging_config import ProgressLogger
+    
+    worker_index = _claim_worker_index(worker_counter)
+    if _pin_workers_enabled() and hasattr(os, 'sched_setaffinity'):
+        _pin_to_cpu_slot(worker_index)
+    
+    logger = ProgressLogger(f"{logger_session}_process_{worker_index}")
+    # Pool workers leave via os._exit, so close the session from the
+    # multiprocessing exit hooks rather than atexit
+    Finalize(logger, logger.close_session, exitpriority=10)
+    _partition_worker = (worker_index, logger)
+    
+    _get_partition_tables(n)
+
+
+def _count_second_row_task(r: int, n: int, second_row_indices: Sequence[int]) -> Tuple[int, int, int, float]:
+    """Pool task: count one chunk of second rows through this worker's logger."""
+    worker_index, logger = _partition_worker
+    return count_rectangles_ultra_bitwise_partition(
+        r, n, second_row_indices, worker_index, logger=logger
+    )
+
+
+def _iter_completion_task_futures(r: int, n: int, tasks: List[List[List[int]]],
+                                  num_processes: int, logger_session: Optional[str]):
+    """
+    Run first-column completion tasks and yield (task_id, future) as each finishes.
+    
+    With a single process the tasks run in this process instead: there is no
+    parallelism to gain from a pool, only its start-up and pickling costs.
+    """
+    if num_processes == 1:
+        for task_id, task_choices in enumerate(tasks):
+            future = Future()
+            try:
+                future.set_result(count_rectangles_first_column_partition_with_completion(
+                    r, n, task_choices, task_id, logger_session
+                ))
+            except Exception as e:
+                future.set_exception(e)
+            yield task_id, future
+        return
+    
+    # Shared counter handing each new worker its CPU slot
+    context = _pool_context()
+    _preload_for_fork(context, n)
+    worker_counter = context.Value('i', 0)
+    with ProcessPoolExecutor(max_workers=num_processes,
+                             mp_context=context,
+                             initializer=_init_completion_worker,
+                             initargs=(n, worker_counter)) as executor:
+        future_to_task = {}
+        for task_id, task_choices in enumerate(tasks):
+            future = executor.submit(
+                count_rectangles_first_column_partition_with_completion,
+                r, n, task_choices, task_id, logger_session
+            )
+            future_to_task[future] = task_id
+        
+        for future in as_completed(future_to_task):
+            yield future_to_task[future], future
+
+
 def count_rectangles_parallel_first_column_with_completion(r: int, n: int, 
                                                           num_processes: Optional[int] = None,
                                                           logger_session: Optional[str] = None) -> Tuple[CountResult, CountResult]:
@@ -708,39 +1005,30 @@ def count_rectangles_parallel_first_column_with_completion(r: int, n: int,
     
     # Auto-detect optimal process count
     if num_processes is None:
-        num_processes = min(mp.cpu_count(), 8)
+        num_processes = default_num_processes()
     
     logger.info(f"🚀 Using parallel first column optimization with completion ({num_processes} processes)")
     logger.info(f"   Computing ({r},{n}) and ({n},{n}) together using completion optimization")
-    print(f"🚀 Using parallel first column optimization with completion ({num_processes} processes)")
-    print(f"   Computing ({r},{n}) and ({n},{n}) together using completion optimization")
     
     # Generate first column choices
     enumerator = FirstColumnEnumerator()
     first_columns = enumerator.enumerate_first_columns(r, n)
-    symmetry_calculator = SymmetryCalculator()
-    symmetry_factor = symmetry_calculator.get_symmetry_factor(r)
+    symmetry_factor = _symmetry_calculator.get_symmetry_factor(r)
     
     logger.info(f"   📊 Total first-column choices: {len(first_columns):,}")
     logger.info(f"   🔢 Symmetry factor: {symmetry_factor} (each choice represents {symmetry_factor} rectangles)")
-    print(f"   📊 Total first-column choices: {len(first_columns):,}")
-    print(f"   🔢 Symmetry factor: {symmetry_factor} (each choice represents {symmetry_factor} rectangles)")
     
-    # Create balanced work partitions by distributing first column choices
     if len(first_columns) < num_processes:
         num_processes = len(first_columns)
     
-    partitions = [[] for _ in range(num_processes)]
+    # One task per first column. Relabelling symbols 2..n maps any first column
+    # onto any other without changing row signs, so every task has the same size
+    # and submission order needs no largest-first sorting; idle workers simply
+    # pull the next column instead of waiting on a fixed partition
+    tasks = [[first_column] for first_column in first_columns]
+    num_tasks = len(tasks)
     
-    # Distribute first columns in round-robin fashion for balanced load
-    for i, first_column in enumerate(first_columns):
-        process_idx = i % num_processes
-        partitions[process_idx].append(first_column)
-    
-    # Log the distribution
-    for i, partition_choices in enumerate(partitions):
-        logger.info(f"   Process {i+1}: {len(partition_choices):,} first column choices")
-        print(f"   Process {i+1}: {len(partition_choices):,} first column choices")
+    logger.info(f"   Scheduling {num_tasks:,} first-column tasks across {num_processes} processes")
     
     # Initialize counts for both (r,n) and (n,n)
     total_r = 0
@@ -750,62 +1038,33 @@ def count_rectangles_parallel_first_column_with_completion(r: int, n: int,
     positive_r_plus_1 = 0
     negative_r_plus_1 = 0
     
-    # Execute in parallel
-    with ProcessPoolExecutor(max_workers=num_processes) as executor:
-        # Submit all tasks
-        futures = []
-        for i, partition_choices in enumerate(partitions):
-            future = executor.submit(
-                count_rectangles_first_column_partition_with_completion,
-                r, n, partition_choices, i, logger_session
-            )
-            futures.append((i, future))
-        
-        # Collect results as they complete
-        completed = 0
-        process_results = {}
-        
-        for future in as_completed([f for _, f in futures]):
-            try:
-                # Find which process this future belongs to
-                process_id = None
-                for i, (pid, fut) in enumerate(futures):
-                    if fut == future:
-                        process_id = pid
-                        break
-                
-                part_total_r, part_pos_r, part_neg_r, part_total_r_plus_1, part_pos_r_plus_1, part_neg_r_plus_1, part_time = future.result()
-                
-                total_r += part_total_r
-                positive_r += part_pos_r
-                negative_r += part_neg_r
-                total_r_plus_1 += part_total_r_plus_1
-                positive_r_plus_1 += part_pos_r_plus_1
-                negative_r_plus_1 += part_neg_r_plus_1
-                
-                completed += 1
-                process_results[process_id] = {
-                    'total_r': part_total_r,
-                    'total_r_plus_1': part_total_r_plus_1,
-                    'time': part_time
-                }
-                
-                # Show per-process completion
-                rate_r = part_total_r / part_time if part_time > 0 else 0
-                rate_r_plus_1 = part_total_r_plus_1 / part_time if part_time > 0 else 0
-                logger.info(f"✅ Process {process_id+1}/{num_processes}: ({r},{n})={part_total_r:,} ({n},{n})={part_total_r_plus_1:,} in {part_time:.2f}s")
-                print(f"✅ Process {process_id+1}/{num_processes}: ({r},{n})={part_total_r:,} ({n},{n})={part_total_r_plus_1:,} in {part_time:.2f}s")
-                
-                # Show overall progress
-                progress_pct = (completed / num_processes) * 100
-                elapsed_time = time.time() - start_time
-                logger.info(f"📊 Progress: {completed}/{num_processes} ({progress_pct:.0f}%) - ({r},{n})={total_r:,} ({n},{n})={total_r_plus_1:,} - {elapsed_time:.1f}s elapsed")
-                print(f"📊 Progress: {completed}/{num_processes} ({progress_pct:.0f}%) - ({r},{n})={total_r:,} ({n},{n})={total_r_plus_1:,}")
-                
-            except Exception as e:
-                print(f"❌ Process failed: {e}")
-                import traceback
-                traceback.print_exc()
+    # Execute tasks and collect results as they complete
+    completed = 0
+    busy_time = 0.0
+    
+    for process_id, future in _iter_completion_task_futures(r, n, tasks, num_processes, logger_session):
+        try:
+            part_total_r, part_pos_r, part_neg_r, part_total_r_plus_1, part_pos_r_plus_1, part_neg_r_plus_1, part_time = future.result()
+            
+            total_r += part_total_r
+            positive_r += part_pos_r
+            negative_r += part_neg_r
+            total_r_plus_1 += part_total_r_plus_1
+            positive_r_plus_1 += part_pos_r_plus_1
+            negative_r_plus_1 += part_neg_r_plus_1
+            
+            completed += 1
+            busy_time += part_time
+            
+            # One combined line per completion
+            line = (f"✅ Task {process_id+1}/{num_tasks}: ({r},{n})={part_total_r:,} "
+                    f"({n},{n})={part_total_r_plus_1:,} in {part_time:.2f}s [{completed}/{num_tasks} done]")
+            logger.info(line)
+            
+        except Exception as e:
+            logger.error(f"❌ Process failed: {e}")
+            import traceback
+            traceback.print_exc()
     
     computation_time = time.time() - start_time
     
@@ -816,20 +1075,12 @@ def count_rectangles_parallel_first_column_with_completion(r: int, n: int,
     logger.info(f"   ({n},{n}): {total_r_plus_1:,} rectangles (+{positive_r_plus_1:,} -{negative_r_plus_1:,})")
     logger.info(f"   Combined rate: {(total_r + total_r_plus_1)/computation_time:,.0f} rect/s")
     
-    print(f"\n✅ PARALLEL FIRST COLUMN COMPLETION OPTIMIZATION COMPLETE!")
-    print(f"   Total time: {computation_time:.2f}s")
-    print(f"   ({r},{n}): {total_r:,} rectangles (+{positive_r:,} -{negative_r:,})")
-    print(f"   ({n},{n}): {total_r_plus_1:,} rectangles (+{positive_r_plus_1:,} -{negative_r_plus_1:,})")
-    print(f"   Combined rate: {(total_r + total_r_plus_1)/computation_time:,.0f} rect/s")
-    
-    if process_results:
-        avg_time = sum(r['time'] for r in process_results.values()) / len(process_results)
-        speedup = avg_time / computation_time if computation_time > 0 else 0
+    if completed:
+        # Tasks outnumber processes, so compare total work time to wall time
+        speedup = busy_time / computation_time if computation_time > 0 else 0
         efficiency = speedup / num_processes * 100 if num_processes > 0 else 0
         logger.info(f"   Parallel speedup: {speedup:.2f}x")
         logger.info(f"   Parallel efficiency: {efficiency:.1f}%")
-        print(f"   Parallel speedup: {speedup:.2f}x")
-        print(f"   Parallel efficiency: {efficiency:.1f}%")
     
     # Close the logger session
     logger.close_session()
@@ -854,3 +1105,132 @@ def count_rectangles_parallel_first_column_with_completion(r: int, n: int,
     )
     
     return result_r, result_r_plus_1
+
+
+def count_rectangles_parallel_ultra_bitwise(r: int, n: int,
+                                            num_processes: Optional[int] = None,
+                                            logger_session: Optional[str] = None) -> CountResult:
+    """
+    Count Latin rectangles in parallel by partitioning on the second row.
+    
+    The second-row derangements are split into many small contiguous index
+    ranges (about _TASKS_PER_PROCESS per process) and handed to a process pool,
+    so a worker that finishes early pulls the next range instead of idling
+    while a slower partition holds up the join.
+    
+    Args:
+        r: Number of rows
+        n: Number of columns
+        num_processes: Number of processes to use (None = auto-detect)
+        logger_session: Custom session name for logging (None = auto-generate)
+        
+    Returns:
+        CountResult with computation results
+
+    Raises:
+        ValueError: If r, n or num_processes are out of range
+        Exception: Whatever a second-row task raised; the remaining tasks are
+            cancelled instead of returning a partial count
+    """
+    if r < 2:
+        raise ValueError(f"r must be >= 2, got r={r}")
+    if r > n:
+        raise ValueError(f"r must be <= n, got r={r}, n={n}")
+    if num_processes is not None and num_processes <= 0:
+        raise ValueError(f"num_processes must be positive, got {num_processes}")
+    
+    start_time = time.time()
+    
+    # Set up main session logger
+    from core.logging_config import ProgressLogger
+    if logger_session is None:
+        logger_session = f"parallel_ultra_{r}_{n}"
+    logger = ProgressLogger(logger_session)
+    
+    # Auto-detect optimal process count
+    if num_processes is None:
+        num_processes = default_num_processes()
+    
+    num_second_rows = len(get_smart_derangements_with_signs(n))
+    num_processes = max(1, min(num_processes, num_second_rows))
+    
+    # Contiguous index ranges pickle as three ints each
+    chunk_size = max(1, num_second_rows // (num_processes * _TASKS_PER_PROCESS))
+    tasks = [range(start, min(start + chunk_size, num_second_rows))
+             for start in range(0, num_second_rows, chunk_size)]
+    num_tasks = len(tasks)
+    
+    logger.info(f"🚀 Using parallel ultra-safe bitwise with {num_processes} processes")
+    logger.info(f"   📊 Second-row derangements: {num_second_rows:,}")
+    logger.info(f"   Scheduling {num_tasks:,} second-row tasks across {num_processes} processes")
+    
+    total_count = 0
+    positive_count = 0
+    negative_count = 0
+    completed = 0
+    busy_time = 0.0
+    
+    # Shared counter handing each new worker its index (log files, CPU slot)
+    context = _pool_context()
+    _preload_for_fork(context, n, partition_tables=True)
+    worker_counter = context.Value('i', 0)
+    with ProcessPoolExecutor(max_workers=num_processes,
+                             mp_context=context,
+                             initializer=_init_partition_worker,
+                             initargs=(r, n, logger_session, worker_counter)) as executor:
+        future_to_task = {}
+        for task_id, second_row_indices in enumerate(tasks):
+            future = executor.submit(_count_second_row_task, r, n, second_row_indices)
+            future_to_task[future] = task_id
+        
+        for future in as_completed(future_to_task):
+            task_id = future_to_task[future]
+            try:
+                part_total, part_positive, part_negative, part_time = future.result()
+            except Exception as e:
+                # A missing range would leave the count silently short, so
+                # drop the queued ranges and fail the whole run
+                logger.error(f"❌ Task {task_id+1}/{num_tasks} failed: {e}")
+                for pending in future_to_task:
+                    pending.cancel()
+                logger.close_session()
+                raise
+
+            total_count += part_total
+            positive_count += part_positive
+            negative_count += part_negative
+
+            completed += 1
+            busy_time += part_time
+
+            # One combined line per completion
+            line = (f"✅ Task {task_id+1}/{num_tasks}: {part_total:,} rectangles "
+                    f"in {part_time:.2f}s [{completed}/{num_tasks} done]")
+            logger.info(line)
+    
+    computation_time = time.time() - start_time
+    
+    # Show final summary
+    logger.info(f"\n✅ PARALLEL ULTRA-SAFE BITWISE COMPLETE!")
+    logger.info(f"   Total time: {computation_time:.2f}s")
+    logger.info(f"   Total rectangles: {total_count:,}")
+    logger.info(f"   Result: +{positive_count:,} -{negative_count:,}")
+    
+    if completed:
+        # Tasks outnumber processes, so compare total work time to wall time
+        speedup = busy_time / computation_time if computation_time > 0 else 0
+        efficiency = speedup / num_processes * 100
+        logger.info(f"   Parallel speedup: {speedup:.2f}x")
+        logger.info(f"   Parallel efficiency: {efficiency:.1f}%")
+    
+    # Close the logger session
+    logger.close_session()
+    
+    return CountResult(
+        r=r, n=n,
+        positive_count=positive_count,
+        negative_count=negative_count,
+        difference=positive_count - negative_count,
+        from_cache=False,
+        computation_time=computation_time
+    )
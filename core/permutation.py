@@ -15,8 +15,16 @@ def permutation_sign(perm: List[int]) -> int:
     An inversion is a pair of indices (i, j) where i < j but perm[i] > perm[j].
     The sign is +1 if the number of inversions is even, -1 if odd.
     
+    The parity is found from the cycle structure instead of counting the
+    O(n²) inversions: a cycle of length k is k-1 transpositions, so the sign
+    is (-1)^(n - number of cycles). The cycles are walked on the rank order
+    of the values (the inverse permutation, which has the same sign), so any
+    distinct comparable values work, not just 1..n; sorting makes it
+    O(n log n).
+    
     Args:
-        perm: A permutation represented as a list of integers
+        perm: A permutation of [1, 2, ..., n] represented as a list of integers
+            (any sequence of distinct comparable values is accepted)
         
     Returns:
         +1 if the permutation has even parity (even number of inversions)
@@ -30,19 +38,24 @@ def permutation_sign(perm: List[int]) -> int:
         >>> permutation_sign([3, 2, 1])
         -1
     """
-    # Handle edge cases
-    if len(perm) <= 1:
-        return 1
+    # order[k] is the index of the k-th smallest value: the inverse permutation
+    order = sorted(range(len(perm)), key=perm.__getitem__)
     
-    # Count inversions
-    inversions = 0
-    for i in range(len(perm)):
-        for j in range(i + 1, len(perm)):
-            if perm[i] > perm[j]:
-                inversions += 1
+    # Walk each cycle once; every element after a cycle's first flips parity
+    visited = [False] * len(order)
+    parity = 0
+    for start in range(len(order)):
+        if visited[start]:
+            continue
+        visited[start] = True
+        position = order[start]
+        while position != start:
+            visited[position] = True
+            position = order[position]
+            parity ^= 1
     
     # Return sign based on parity of inversions
-    return 1 if inversions % 2 == 0 else -1
+    return 1 if parity == 0 else -1
 
 
 
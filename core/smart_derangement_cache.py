@@ -14,7 +14,11 @@ from typing import List, Tuple, Dict, Set
 from pathlib import Path
 
 from core.bitset_constraints import BitsetConstraints, generate_constrained_permutations_bitset_optimized
-from core.latin_rectangle import LatinRectangle
+from core.permutation import permutation_sign
+
+
+# Most constraint states kept in a cache's constraint_cache (LRU eviction)
+_CONSTRAINT_CACHE_SIZE = 1024
 
 
 class SmartDerangementCache:
@@ -39,7 +43,7 @@ class SmartDerangementCache:
         # Database-style indices for ultra-fast constraint filtering
         self.position_value_index: Dict[Tuple[int, int], Set[int]] = {}  # (pos, val) -> set of derangement indices
         self.position_forbidden_index: Dict[Tuple[int, frozenset], Set[int]] = {}  # (pos, forbidden_vals) -> compatible indices
-        self.constraint_cache: Dict[str, Set[int]] = {}  # constraint_hash -> compatible indices
+        self.constraint_cache: Dict[tuple, Tuple[Tuple[List[int], int], ...]] = {}  # fingerprint -> compatible derangements
         
         # Legacy indices (kept for compatibility)
         self.prefix_index: Dict[int, List[int]] = {}  # first_value -> list of indices
@@ -142,12 +146,10 @@ class SmartDerangementCache:
         
         print(f"   Generated {len(derangements):,} derangements")
         
-        # Pre-compute signs for 2-row rectangles
+        # Pre-compute signs for 2-row rectangles (the identity first row has
+        # sign +1, so the rectangle's sign is the derangement's own sign)
         for derangement in derangements:
-            # Create 2-row rectangle to get sign
-            rect = LatinRectangle(2, self.n, [list(range(1, self.n + 1)), derangement])
-            sign = rect.compute_sign()
-            self.derangements_with_signs.append((derangement, sign))
+            self.derangements_with_signs.append((derangement, permutation_sign(derangement)))
         
         # Sort lexicographically for prefix optimization
         self.derangements_with_signs.sort(key=lambda x: x[0])
@@ -204,19 +206,6 @@ class SmartDerangementCache:
         
         print(f"     Position-value index: {len(self.position_value_index)} entries")
     
-    def _get_constraint_hash(self, constraints: BitsetConstraints) -> str:
-        """Generate a hash key for constraint state for caching."""
-        # Create a compact representation of the constraint state
-        forbidden_list = []
-        for pos in range(self.n):
-            forbidden_vals = []
-            for val in range(1, self.n + 1):
-                if constraints.is_forbidden(pos, val):
-                    forbidden_vals.append(val)
-            if forbidden_vals:
-                forbidden_list.append(f"{pos}:{','.join(map(str, forbidden_vals))}")
-        return "|".join(forbidden_list)
-    
     def get_compatible_derangements(self, constraints: BitsetConstraints, 
                                   max_prefix_length: int = 2) -> List[Tuple[List[int], int]]:
         """
@@ -257,12 +246,12 @@ class SmartDerangementCache:
     def _get_compatible_with_database_index(self, constraints: BitsetConstraints) -> List[Tuple[List[int], int]]:
         """Get compatible derangements using optimized removal-based filtering."""
         
-        # Check cache first
-        constraint_hash = self._get_constraint_hash(constraints)
-        if constraint_hash in self.constraint_cache:
-            compatible_indices = self.constraint_cache[constraint_hash]
-            return [(self.derangements_with_signs[i][0], self.derangements_with_signs[i][1]) 
-                    for i in compatible_indices]
+        # Check cache first; a hit moves the entry to the most recent end
+        fingerprint = constraints.fingerprint()
+        cached = self.constraint_cache.pop(fingerprint, None)
+        if cached is not None:
+            self.constraint_cache[fingerprint] = cached
+            return list(cached)
         
         # Step 1: Start with all derangement indices allowed
         compatible_indices = set(range(len(self.derangements_with_signs)))
@@ -286,12 +275,14 @@ class SmartDerangementCache:
             if not compatible_indices:
                 break
         
-        # Cache the result for future use
-        self.constraint_cache[constraint_hash] = compatible_indices
+        # Cache the result for future use, evicting the least recently used
+        compatible = tuple(self.derangements_with_signs[i] for i in compatible_indices)
+        self.constraint_cache[fingerprint] = compatible
+        if len(self.constraint_cache) > _CONSTRAINT_CACHE_SIZE:
+            del self.constraint_cache[next(iter(self.constraint_cache))]
         
         # Return the compatible derangements with signs
-        return [(self.derangements_with_signs[i][0], self.derangements_with_signs[i][1]) 
-                for i in compatible_indices]
+        return list(compatible)
     
     def _get_compatible_with_multi_prefix(self, constraints: BitsetConstraints) -> List[Tuple[List[int], int]]:
         """Get compatible derangements using multi-element prefix optimization (legacy)."""
@@ -432,6 +423,31 @@ def get_smart_derangements_with_signs(n: int) -> List[Tuple[List[int], int]]:
     return cache.get_all_derangements_with_signs()
 
 
+# Per-n row -> sign lookups, built once per process
+_sign_lookups: Dict[int, Dict[Tuple[int, ...], int]] = {}
+
+
+def get_derangement_sign_lookup(n: int) -> Dict[Tuple[int, ...], int]:
+    """
+    Get a dict mapping each derangement (as a tuple) to its sign.
+    
+    Built once per n and shared, so finding a row's sign is a single hash
+    lookup instead of a scan over all derangements. Callers must not mutate it.
+    
+    Args:
+        n: Size of permutations
+        
+    Returns:
+        Dict of derangement tuple -> sign (+1 or -1)
+    """
+    if n not in _sign_lookups:
+        _sign_lookups[n] = {
+            tuple(derang.tolist() if hasattr(derang, 'tolist') else derang): int(sign)
+            for derang, sign in get_smart_derangements_with_signs(n)
+        }
+    return _sign_lookups[n]
+
+
 def get_constraint_compatible_derangements(n: int, constraints: BitsetConstraints) -> List[Tuple[List[int], int]]:
     """
     Get derangements compatible with constraints using smart optimization.
@@ -1,28 +1,322 @@
 #!/usr/bin/env python3
 """
-Ultra-optimized constrained enumeration with full r≤10 support and parallel processing.
+Ultra-optimized constrained enumeration for any r and parallel processing.
 
 This module integrates our breakthrough optimization techniques:
 1. Pre-filtered derangement sets (5-7x reduction per row)
-2. Fast popcount using Brian Kernighan's algorithm
+2. Fast popcount using the native int.bit_count
 3. Pre-computed constraint lookup tables
 4. Pre-computed base masks for final rows
 5. Early termination with constraint propagation
-6. Support for both explicit nested loops (r≤6) and stack-based approach (r≤10)
+6. One DFS shared by every r, carrying per-row candidate masks
+7. Subtree memoization on (level, candidate masks)
 """
 
 import time
+import weakref
 from typing import List, Tuple, Dict, Optional
 from core.smart_derangement_cache import get_smart_derangement_cache
 
 
-def popcount(x: int) -> int:
-    """Fast bit counting using Brian Kernighan's algorithm."""
-    count = 0
-    while x:
-        count += 1
-        x &= x - 1
-    return count
+if hasattr(int, "bit_count"):
+    def popcount(x: int) -> int:
+        """Fast bit counting using the native int.bit_count (Python 3.10+)."""
+        return x.bit_count()
+else:  # pragma: no cover - Python 3.9
+    def popcount(x: int) -> int:
+        """Bit counting via the binary string, still C-speed for wide masks."""
+        return bin(x).count("1")
+
+
+def _indices_to_mask(indices, size: int) -> int:
+    """Build a bitmask from bit indices via a bytearray (linear in size)."""
+    bitmap = bytearray((size + 7) // 8)
+    for idx in indices:
+        bitmap[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+def _count_derangements(cache) -> int:
+    """Number of derangements held by either cache type."""
+    if hasattr(cache, 'get_bitwise_data'):
+        return len(cache.signs)
+    return len(cache.derangements_with_signs)
+
+
+def _filter_by_leading_value(cache, value: int) -> Tuple[List[List[int]], List[int]]:
+    """
+    Select the derangements starting with value, as parallel row/sign lists.
+    
+    The binary cache is filtered straight from its (count, n) array with one
+    vectorized comparison, so only the selected rows are converted to lists.
+    """
+    if hasattr(cache, 'get_bitwise_data'):
+        selected = (cache.derangements[:, 0] == value).nonzero()[0]
+        return cache.derangements[selected].tolist(), cache.signs[selected].tolist()
+    
+    filtered_derangements = []
+    filtered_signs = []
+    for derangement, sign in cache.derangements_with_signs:
+        if derangement[0] == value:
+            filtered_derangements.append(list(derangement))
+            filtered_signs.append(sign)
+    return filtered_derangements, filtered_signs
+
+
+def _build_constraint_table(n: int, filtered_set: Dict[str, list]) -> List[List[int]]:
+    """
+    Pre-compute the flat constraint lookup table for one filtered set.
+    
+    table[pos][val] is the mask of candidates in the set that do NOT have
+    value val at position pos, i.e. those still allowed below a row placing
+    val there. Storing the complement lets the hot loop AND directly instead
+    of allocating ~conflict on every lookup, and nested lists indexed by
+    position and value avoid hashing a (pos, val) tuple.
+    """
+    derangements = filtered_set['derangements']
+    set_size = len(derangements)
+    full_mask = (1 << set_size) - 1
+    table = []
+    for pos in range(n):
+        conflicts_by_value = [[] for _ in range(n + 1)]
+        for idx, derangement in enumerate(derangements):
+            conflicts_by_value[derangement[pos]].append(idx)
+        table.append([full_mask ^ _indices_to_mask(indices, set_size) for indices in conflicts_by_value])
+    return table
+
+
+# Per-cache memo of (filtered set, constraint table) by leading value; weak
+# keys so a discarded cache takes its tables with it
+_row_candidates_memo = weakref.WeakKeyDictionary()
+
+
+def _get_row_candidates(n: int, cache, value: int) -> Tuple[Dict[str, list], List[List[int]]]:
+    """
+    Get the filtered set and constraint table for rows starting with value.
+    
+    Both depend only on the leading value, which recurs across the first
+    columns a process handles, so each is built once per cache.
+    """
+    by_value = _row_candidates_memo.setdefault(cache, {})
+    if value not in by_value:
+        filtered_derangements, filtered_signs = _filter_by_leading_value(cache, value)
+        filtered_set = {
+            'derangements': filtered_derangements,
+            'signs': filtered_signs
+        }
+        by_value[value] = (filtered_set, _build_constraint_table(n, filtered_set))
+    return by_value[value]
+
+
+def _prefilter_derangement_sets(r: int, n: int, first_column: List[int],
+                                cache) -> Tuple[List[Dict[str, list]], List[List[List[int]]]]:
+    """
+    Pre-filter derangements into one candidate set per row below the first.
+    
+    Row i must start with first_column[i], so each set holds only the
+    derangements with that leading value (~1/(n-1) of all derangements).
+    
+    Returns:
+        Tuple of (r-1 dicts with parallel 'derangements' and 'signs' lists,
+        matching flat constraint tables)
+    """
+    filtered_sets = []
+    constraint_tables = []
+    num_derangements = _count_derangements(cache)
+    
+    print(f"   Pre-filtering derangements for {r-1} rows...")
+    for row_idx in range(1, r):  # rows 1 to r-1
+        filtered_set, constraint_table = _get_row_candidates(n, cache, first_column[row_idx])
+        filtered_sets.append(filtered_set)
+        constraint_tables.append(constraint_table)
+        
+        set_size = len(filtered_set['derangements'])
+        reduction = num_derangements / set_size if set_size > 0 else float('inf')
+        print(f"   Row {row_idx+1}: {set_size}/{num_derangements} candidates ({reduction:.1f}x reduction)")
+    
+    return filtered_sets, constraint_tables
+
+
+def _build_completion_constraint_table(n: int, cache) -> List[List[int]]:
+    """
+    Pre-compute the flat (allowed-mask) constraint table for the completion row.
+    
+    The completion row ranges over all derangements, so its table is indexed
+    in the original (unfiltered) derangement order.
+    """
+    print(f"   Pre-computing completion constraint table...")
+    if hasattr(cache, 'get_bitwise_data'):
+        # Binary cache ships pre-computed conflict masks
+        conflict_masks, all_valid_mask = cache.get_bitwise_data()
+        return [[all_valid_mask] + [all_valid_mask ^ conflict_masks.get((pos, val), 0) for val in range(1, n + 1)]
+                for pos in range(n)]
+    
+    num_derangements = _count_derangements(cache)
+    full_mask = (1 << num_derangements) - 1
+    position_value_index = cache.position_value_index
+    return [[full_mask] + [full_mask ^ _indices_to_mask(position_value_index.get((pos, val), ()), num_derangements)
+                   for val in range(1, n + 1)]
+            for pos in range(n)]
+
+
+def _build_completion_sign_masks(cache) -> Tuple[int, int]:
+    """
+    Split all derangements (the completion row's candidates) by sign.
+    
+    Returns:
+        Tuple of (positive_mask, negative_mask) over the unfiltered order
+    """
+    if hasattr(cache, 'get_bitwise_data'):
+        import numpy as np
+        positive_bits = np.packbits(cache.signs > 0, bitorder='little')
+        negative_bits = np.packbits(cache.signs < 0, bitorder='little')
+        return (int.from_bytes(positive_bits.tobytes(), 'little'),
+                int.from_bytes(negative_bits.tobytes(), 'little'))
+    
+    num_derangements = _count_derangements(cache)
+    signs = [sign for _, sign in cache.derangements_with_signs]
+    return (_indices_to_mask((idx for idx, sign in enumerate(signs) if sign > 0), num_derangements),
+            _indices_to_mask((idx for idx, sign in enumerate(signs) if sign < 0), num_derangements))
+
+
+# Budget for the DFS subtree memo, in bytes of stored candidate masks
+_SUBTREE_MEMO_BYTES = 256 << 20
+
+
+def _count_rectangles_dfs(n: int, filtered_sets: List[Dict[str, list]],
+                          constraint_tables: List[List[List[int]]],
+                          completion_constraint_table: Optional[List[List[int]]] = None,
+                          completion_sign_masks: Optional[Tuple[int, int]] = None) -> Tuple[int, int, int, int]:
+    """
+    Count rectangles over pre-filtered row sets with one memoized recursive DFS.
+    
+    A single search serves every depth instead of one hand-written nest per r.
+    Each node carries the candidate mask of every row not yet placed, already
+    narrowed by the rows above it, so placing a row only ANDs out that row's
+    own conflicts; nodes with identical masks share their subtree counts.
+    
+    The search recurses rather than keeping an explicit stack: a memoized
+    subtree count has to be returned to its parent before it can be stored,
+    which plain recursion gives for free, and the depth is only one call per
+    row (at most n), far below the interpreter's recursion limit.
+    
+    Without a completion table the last row is counted in bulk with popcount.
+    With one (r = n-1), every (r, n) rectangle is also completed to (n, n)
+    through the completion row, which ranges over all derangements.
+    
+    Returns:
+        Tuple of (positive_r, negative_r, positive_r_plus_1, negative_r_plus_1);
+        the (n, n) counts are 0 when no completion table is given
+    """
+    level_rows = [filtered_set['derangements'] for filtered_set in filtered_sets]
+    level_signs = [filtered_set['signs'] for filtered_set in filtered_sets]
+    # Signs as parity bits (0 = +1, 1 = -1): products become XORs
+    level_parities = [[1 if sign < 0 else 0 for sign in signs] for signs in level_signs]
+    level_tables = list(constraint_tables)
+    initial_masks = [(1 << len(rows)) - 1 for rows in level_rows]
+    
+    with_completion = completion_constraint_table is not None
+    if with_completion:
+        # The completion row behaves like one more level over all derangements
+        level_tables.append(completion_constraint_table)
+        positive_completion_mask, negative_completion_mask = completion_sign_masks
+        initial_masks.append(positive_completion_mask | negative_completion_mask)
+        leaf_level = len(filtered_sets) - 1
+    else:
+        # Rows of the last set are counted by popcount from the level above
+        leaf_level = len(filtered_sets) - 2
+        positive_final_mask = 0
+        negative_final_mask = 0
+        for final_idx, final_sign in enumerate(level_signs[-1]):
+            if final_sign > 0:
+                positive_final_mask |= (1 << final_idx)
+            else:
+                negative_final_mask |= (1 << final_idx)
+    
+    positions = range(n)
+    
+    # Subtree counts keyed by (level, masks): different row choices often leave
+    # identical candidate masks behind, and the counts below depend on nothing
+    # else. Bounded by mask bytes since masks grow to ~1.3M bits at n=10
+    memo = {}
+    memo_bytes = 0
+    
+    def count_subtree(level: int, masks: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """
+        Count rectangles below one node as if its accumulated parity were 0.
+        
+        masks[0] holds the candidates for this level and masks[1:] those of
+        every later level (and the completion row).
+        
+        Returns:
+            Tuple of (r even, r odd, r+1 even, r+1 odd) counts by parity
+        """
+        nonlocal memo_bytes
+        key = (level, masks)
+        cached = memo.pop(key, None)
+        if cached is not None:
+            memo[key] = cached  # Re-insert as most recently used
+            return cached
+        
+        # Indexed by parity: [positive, negative]
+        counts_r = [0, 0]
+        counts_r_plus_1 = [0, 0]
+        
+        rows = level_rows[level]
+        parities = level_parities[level]
+        later_tables = level_tables[level + 1:]
+        later_masks = masks[1:]
+        
+        current_mask = masks[0]
+        while current_mask:
+            current_idx = (current_mask & -current_mask).bit_length() - 1
+            current_mask &= current_mask - 1
+            current_row = rows[current_idx]
+            current_parity = parities[current_idx]
+            
+            # Narrow every later level by this row's conflicts. A level left
+            # empty (the completion row included, as every (n-1, n) rectangle
+            # completes) means nothing below can finish, so skip the row at once
+            next_masks = []
+            for next_valid, table in zip(later_masks, later_tables):
+                for pos in positions:
+                    next_valid &= table[pos][current_row[pos]]
+                if not next_valid:
+                    break
+                next_masks.append(next_valid)
+            else:
+                if level < leaf_level:
+                    sub_r_even, sub_r_odd, sub_r1_even, sub_r1_odd = count_subtree(level + 1, tuple(next_masks))
+                    counts_r[current_parity] += sub_r_even
+                    counts_r[current_parity ^ 1] += sub_r_odd
+                    counts_r_plus_1[current_parity] += sub_r1_even
+                    counts_r_plus_1[current_parity ^ 1] += sub_r1_odd
+                elif with_completion:
+                    # Count this (r, n) rectangle
+                    counts_r[current_parity] += 1
+                    
+                    # Count its completions to (n, n) by sign with popcount
+                    completion_valid = next_masks[0]
+                    counts_r_plus_1[current_parity] += popcount(completion_valid & positive_completion_mask)
+                    counts_r_plus_1[current_parity ^ 1] += popcount(completion_valid & negative_completion_mask)
+                else:
+                    # Final row - use fast popcount
+                    final_valid = next_masks[0]
+                    counts_r[current_parity] += popcount(final_valid & positive_final_mask)
+                    counts_r[current_parity ^ 1] += popcount(final_valid & negative_final_mask)
+        
+        result = (counts_r[0], counts_r[1], counts_r_plus_1[0], counts_r_plus_1[1])
+        if level > 0:
+            memo[key] = result
+            memo_bytes += sum(mask.bit_length() for mask in masks) // 8
+            while memo_bytes > _SUBTREE_MEMO_BYTES:
+                # Evict the least recently used entry
+                old_level, old_masks = next(iter(memo))
+                del memo[(old_level, old_masks)]
+                memo_bytes -= sum(mask.bit_length() for mask in old_masks) // 8
+        return result
+    
+    return count_subtree(0, tuple(initial_masks))
 
 
 def count_rectangles_ultra_optimized_constrained(r: int, n: int, 
@@ -30,13 +324,13 @@ def count_rectangles_ultra_optimized_constrained(r: int, n: int,
                                                use_stack_approach: bool = None,
                                                cache=None) -> Tuple[int, int]:
     """
-    Ultra-optimized constrained rectangle counting with full r≤10 support.
+    Ultra-optimized constrained rectangle counting for any r.
     
     Args:
         r: Number of rows
         n: Number of columns  
         first_column: Fixed first column values [1, a2, a3, ..., ar]
-        use_stack_approach: Force stack approach (None = auto-decide based on r)
+        use_stack_approach: Ignored; every r shares one iterative DFS (kept for compatibility)
         cache: Pre-loaded smart derangement cache (None = load automatically)
         
     Returns:
@@ -48,8 +342,6 @@ def count_rectangles_ultra_optimized_constrained(r: int, n: int,
         raise ValueError(f"r must be >= 2, got r={r}")
     if r > n:
         raise ValueError(f"r must be <= n, got r={r}, n={n}")
-    if r > 10:
-        raise NotImplementedError(f"Ultra-optimized implementation supports r <= 10, got r={r}")
     if len(first_column) != r:
         raise ValueError(f"first_column must have length r={r}, got {len(first_column)}")
     if first_column[0] != 1:
@@ -68,495 +360,10 @@ def count_rectangles_ultra_optimized_constrained(r: int, n: int,
     if cache is None:
         cache = get_smart_derangement_cache(n)
     
-    # Auto-decide approach based on r
-    if use_stack_approach is None:
-        use_stack_approach = r > 6
-    
-    if use_stack_approach:
-        return _count_rectangles_stack_approach(r, n, first_column, cache)
-    else:
-        return _count_rectangles_explicit_loops(r, n, first_column, cache)
-
-
-def _count_rectangles_explicit_loops(r: int, n: int, first_column: List[int], cache) -> Tuple[int, int]:
-    """
-    Ultra-optimized explicit nested loops approach for r≤6.
-    
-    Uses our breakthrough optimization techniques for maximum performance.
-    """
-    
-    derangements_with_signs = cache.get_all_derangements_with_signs()
-    position_value_index = cache.position_value_index
-    
-    # Filter derangements and create index mappings
-    filtered_sets = []
-    original_to_filtered_maps = []
-    
-    print(f"   Pre-filtering derangements for {r-1} rows...")
-    for row_idx in range(1, r):  # rows 1 to r-1
-        required_start_value = first_column[row_idx]
-        filtered_derangements = []
-        filtered_signs = []
-        original_to_filtered = {}
-        
-        filtered_idx = 0
-        for orig_idx, (derangement, sign) in enumerate(derangements_with_signs):
-            if hasattr(derangement, 'tolist'):
-                derang_list = derangement.tolist()
-            else:
-                derang_list = list(derangement)
-            
-            if derang_list[0] == required_start_value:
-                filtered_derangements.append(derang_list)
-                filtered_signs.append(sign)
-                original_to_filtered[orig_idx] = filtered_idx
-                filtered_idx += 1
-        
-        filtered_sets.append({
-            'derangements': filtered_derangements,
-            'signs': filtered_signs
-        })
-        original_to_filtered_maps.append(original_to_filtered)
-        
-        reduction = len(derangements_with_signs) / len(filtered_derangements) if len(filtered_derangements) > 0 else float('inf')
-        print(f"   Row {row_idx+1}: {len(filtered_derangements)}/{len(derangements_with_signs)} candidates ({reduction:.1f}x reduction)")
-    
-    # Pre-compute constraint lookup tables using proper index mapping
-    print(f"   Pre-computing constraint lookup tables...")
-    constraint_tables = []
-    
-    for set_idx in range(r - 1):
-        table = {}
-        original_to_filtered = original_to_filtered_maps[set_idx]
-        
-        for pos in range(n):
-            for val in range(1, n + 1):
-                mask = 0
-                if (pos, val) in position_value_index:
-                    original_conflicts = set(position_value_index[(pos, val)])
-                    
-                    # Map original indices to filtered indices
-                    for orig_idx in original_conflicts:
-                        if orig_idx in original_to_filtered:
-                            filtered_idx = original_to_filtered[orig_idx]
-                            mask |= (1 << filtered_idx)
-                
-                table[(pos, val)] = mask
-        
-        constraint_tables.append(table)
-    
-    # Pre-compute sign masks for final row
-    final_set = filtered_sets[-1]
-    positive_final_mask = 0
-    negative_final_mask = 0
-    
-    for final_idx, final_sign in enumerate(final_set['signs']):
-        if final_sign > 0:
-            positive_final_mask |= (1 << final_idx)
-        else:
-            negative_final_mask |= (1 << final_idx)
-    
-    positive_count = 0
-    negative_count = 0
-    first_sign = 1
+    filtered_sets, constraint_tables = _prefilter_derangement_sets(r, n, first_column, cache)
     
     print(f"   Starting ultra-optimized rectangle counting...")
-    
-    # Use explicit implementations for each r value for maximum performance
-    if r == 3:
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        third_conflicts = constraint_tables[1]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            # Use fast popcount
-            combined_sign = first_sign * second_sign
-            
-            if combined_sign > 0:
-                positive_rectangles = popcount(third_row_valid & positive_final_mask)
-                negative_rectangles = popcount(third_row_valid & negative_final_mask)
-                positive_count += positive_rectangles
-                negative_count += negative_rectangles
-            else:
-                positive_rectangles = popcount(third_row_valid & negative_final_mask)
-                negative_rectangles = popcount(third_row_valid & positive_final_mask)
-                positive_count += positive_rectangles
-                negative_count += negative_rectangles
-    
-    elif r == 4:
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        
-        # Pre-compute fourth row base masks for each second row
-        print(f"   Pre-computing fourth row base masks...")
-        second_row_fourth_base_masks = []
-        for second_row in second_set['derangements']:
-            fourth_base_mask = (1 << len(fourth_set['derangements'])) - 1
-            for pos in range(n):
-                fourth_base_mask &= ~fourth_conflicts[(pos, second_row[pos])]
-            second_row_fourth_base_masks.append(fourth_base_mask)
-        
-        for second_idx, (second_row, second_sign) in enumerate(zip(second_set['derangements'], second_set['signs'])):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            # Use pre-computed fourth row base mask
-            fourth_base_mask = second_row_fourth_base_masks[second_idx]
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows using pre-computed base mask
-                fourth_row_valid = fourth_base_mask
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                # Use fast popcount
-                combined_sign = first_sign * second_sign * third_sign
-                
-                if combined_sign > 0:
-                    positive_rectangles = popcount(fourth_row_valid & positive_final_mask)
-                    negative_rectangles = popcount(fourth_row_valid & negative_final_mask)
-                    positive_count += positive_rectangles
-                    negative_count += negative_rectangles
-                else:
-                    positive_rectangles = popcount(fourth_row_valid & negative_final_mask)
-                    negative_rectangles = popcount(fourth_row_valid & positive_final_mask)
-                    positive_count += positive_rectangles
-                    negative_count += negative_rectangles
-    
-    elif r == 5:
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        
-        # Pre-compute fifth row base masks for each second row
-        print(f"   Pre-computing fifth row base masks...")
-        second_row_fifth_base_masks = []
-        for second_row in second_set['derangements']:
-            fifth_base_mask = (1 << len(fifth_set['derangements'])) - 1
-            for pos in range(n):
-                fifth_base_mask &= ~fifth_conflicts[(pos, second_row[pos])]
-            second_row_fifth_base_masks.append(fifth_base_mask)
-        
-        for second_idx, (second_row, second_sign) in enumerate(zip(second_set['derangements'], second_set['signs'])):
-            # Progress logging every 100 iterations or at key milestones
-            if second_idx % 100 == 0 or second_idx in [1, 10, 50]:
-                progress_pct = (second_idx / len(second_set['derangements'])) * 100
-                print(f"   Progress: {second_idx:,}/{len(second_set['derangements']):,} second rows ({progress_pct:.1f}%) - {positive_count + negative_count:,} rectangles found")
-            
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            # Use pre-computed fifth row base mask
-            fifth_base_mask = second_row_fifth_base_masks[second_idx]
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows using pre-computed base mask
-                    fifth_row_valid = fifth_base_mask
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    # Use fast popcount
-                    combined_sign = first_sign * second_sign * third_sign * fourth_sign
-                    
-                    if combined_sign > 0:
-                        positive_rectangles = popcount(fifth_row_valid & positive_final_mask)
-                        negative_rectangles = popcount(fifth_row_valid & negative_final_mask)
-                        positive_count += positive_rectangles
-                        negative_count += negative_rectangles
-                    else:
-                        positive_rectangles = popcount(fifth_row_valid & negative_final_mask)
-                        negative_rectangles = popcount(fifth_row_valid & positive_final_mask)
-                        positive_count += positive_rectangles
-                        negative_count += negative_rectangles
-    
-    elif r == 6:
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        sixth_set = filtered_sets[4]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        sixth_conflicts = constraint_tables[4]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Calculate valid sixth rows
-                        sixth_row_valid = (1 << len(sixth_set['derangements'])) - 1
-                        for pos in range(n):
-                            sixth_row_valid &= ~sixth_conflicts[(pos, second_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, third_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fifth_row[pos])]
-                        
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        # Use fast popcount
-                        combined_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign
-                        
-                        if combined_sign > 0:
-                            positive_rectangles = popcount(sixth_row_valid & positive_final_mask)
-                            negative_rectangles = popcount(sixth_row_valid & negative_final_mask)
-                            positive_count += positive_rectangles
-                            negative_count += negative_rectangles
-                        else:
-                            positive_rectangles = popcount(sixth_row_valid & negative_final_mask)
-                            negative_rectangles = popcount(sixth_row_valid & positive_final_mask)
-                            positive_count += positive_rectangles
-                            negative_count += negative_rectangles
-    
-    else:
-        raise NotImplementedError(f"Explicit loops not implemented for r={r} > 6")
-    
-    return positive_count, negative_count
-
-
-def _count_rectangles_stack_approach(r: int, n: int, first_column: List[int], cache) -> Tuple[int, int]:
-    """
-    Ultra-optimized stack-based approach for r≤10.
-    
-    Uses our optimization techniques with iterative stack processing for deeper recursion.
-    """
-    
-    derangements_with_signs = cache.get_all_derangements_with_signs()
-    position_value_index = cache.position_value_index
-    
-    # Filter derangements for each row
-    filtered_sets = []
-    original_to_filtered_maps = []
-    
-    print(f"   Pre-filtering derangements for {r-1} rows...")
-    for row_idx in range(1, r):  # rows 1 to r-1
-        required_start_value = first_column[row_idx]
-        filtered_derangements = []
-        filtered_signs = []
-        original_to_filtered = {}
-        
-        filtered_idx = 0
-        for orig_idx, (derangement, sign) in enumerate(derangements_with_signs):
-            if hasattr(derangement, 'tolist'):
-                derang_list = derangement.tolist()
-            else:
-                derang_list = list(derangement)
-            
-            if derang_list[0] == required_start_value:
-                filtered_derangements.append(derang_list)
-                filtered_signs.append(sign)
-                original_to_filtered[orig_idx] = filtered_idx
-                filtered_idx += 1
-        
-        filtered_sets.append({
-            'derangements': filtered_derangements,
-            'signs': filtered_signs
-        })
-        original_to_filtered_maps.append(original_to_filtered)
-        
-        reduction = len(derangements_with_signs) / len(filtered_derangements) if len(filtered_derangements) > 0 else float('inf')
-        print(f"   Row {row_idx+1}: {len(filtered_derangements)}/{len(derangements_with_signs)} candidates ({reduction:.1f}x reduction)")
-    
-    # Pre-compute constraint lookup tables
-    print(f"   Pre-computing constraint lookup tables...")
-    constraint_tables = []
-    
-    for set_idx in range(r - 1):
-        table = {}
-        original_to_filtered = original_to_filtered_maps[set_idx]
-        
-        for pos in range(n):
-            for val in range(1, n + 1):
-                mask = 0
-                if (pos, val) in position_value_index:
-                    original_conflicts = set(position_value_index[(pos, val)])
-                    
-                    # Map original indices to filtered indices
-                    for orig_idx in original_conflicts:
-                        if orig_idx in original_to_filtered:
-                            filtered_idx = original_to_filtered[orig_idx]
-                            mask |= (1 << filtered_idx)
-                
-                table[(pos, val)] = mask
-        
-        constraint_tables.append(table)
-    
-    # Pre-compute sign masks for final row
-    final_set = filtered_sets[-1]
-    positive_final_mask = 0
-    negative_final_mask = 0
-    
-    for final_idx, final_sign in enumerate(final_set['signs']):
-        if final_sign > 0:
-            positive_final_mask |= (1 << final_idx)
-        else:
-            negative_final_mask |= (1 << final_idx)
-    
-    positive_count = 0
-    negative_count = 0
-    first_sign = 1
-    
-    print(f"   Starting ultra-optimized stack-based rectangle counting...")
-    
-    # Stack-based enumeration for r > 6
-    second_set = filtered_sets[0]
-    
-    for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-        # Calculate initial valid mask for third row
-        third_row_valid = (1 << len(filtered_sets[1]['derangements'])) - 1
-        for pos in range(n):
-            third_row_valid &= ~constraint_tables[1][(pos, second_row[pos])]
-        
-        if third_row_valid == 0:
-            continue
-        
-        # Initialize stack with (level, valid_mask, accumulated_sign)
-        # Level 2 = third row (0-indexed: 0=first, 1=second, 2=third, ...)
-        stack = [(2, third_row_valid, first_sign * second_sign)]
-        
-        while stack:
-            level, valid_mask, accumulated_sign = stack.pop()
-            
-            if level == r - 1:
-                # Final row - use fast popcount
-                if accumulated_sign > 0:
-                    positive_rectangles = popcount(valid_mask & positive_final_mask)
-                    negative_rectangles = popcount(valid_mask & negative_final_mask)
-                    positive_count += positive_rectangles
-                    negative_count += negative_rectangles
-                else:
-                    positive_rectangles = popcount(valid_mask & negative_final_mask)
-                    negative_rectangles = popcount(valid_mask & positive_final_mask)
-                    positive_count += positive_rectangles
-                    negative_count += negative_rectangles
-            else:
-                # Not final row - iterate and push to stack
-                current_set = filtered_sets[level - 1]  # -1 because we skip first row
-                next_conflicts = constraint_tables[level] if level < len(constraint_tables) else constraint_tables[-1]
-                
-                current_mask = valid_mask
-                while current_mask:
-                    current_idx = (current_mask & -current_mask).bit_length() - 1
-                    current_mask &= current_mask - 1
-                    current_row = current_set['derangements'][current_idx]
-                    current_sign = current_set['signs'][current_idx]
-                    
-                    # Calculate valid mask for next row
-                    if level + 1 < r:
-                        next_valid = (1 << len(filtered_sets[level]['derangements'])) - 1
-                        for pos in range(n):
-                            next_valid &= ~next_conflicts[(pos, current_row[pos])]
-                        
-                        if next_valid != 0:
-                            new_accumulated_sign = accumulated_sign * current_sign
-                            stack.append((level + 1, next_valid, new_accumulated_sign))
-    
+    positive_count, negative_count, _, _ = _count_rectangles_dfs(n, filtered_sets, constraint_tables)
     return positive_count, negative_count
 
 
@@ -574,7 +381,7 @@ def count_rectangles_ultra_optimized_constrained_completion(r: int, n: int,
         r: Number of rows (must equal n-1)
         n: Number of columns  
         first_column: Fixed first column values [1, a2, a3, ..., ar]
-        use_stack_approach: Force stack approach (None = auto-decide based on r)
+        use_stack_approach: Ignored; every r shares one iterative DFS (kept for compatibility)
         cache: Pre-loaded smart derangement cache (None = load automatically)
         
     Returns:
@@ -586,8 +393,6 @@ def count_rectangles_ultra_optimized_constrained_completion(r: int, n: int,
         raise ValueError(f"Completion optimization requires r = n-1, got r={r}, n={n}")
     if r < 2:
         raise ValueError(f"r must be >= 2, got r={r}")
-    if r > 10:
-        raise NotImplementedError(f"Ultra-optimized implementation supports r <= 10, got r={r}")
     if len(first_column) != r:
         raise ValueError(f"first_column must have length r={r}, got {len(first_column)}")
     if first_column[0] != 1:
@@ -597,1097 +402,13 @@ def count_rectangles_ultra_optimized_constrained_completion(r: int, n: int,
     if cache is None:
         cache = get_smart_derangement_cache(n)
     
-    # Auto-decide approach based on r
-    if use_stack_approach is None:
-        use_stack_approach = r > 6
-    
-    if use_stack_approach:
-        return _count_rectangles_completion_stack_approach(r, n, first_column, cache)
-    else:
-        return _count_rectangles_completion_explicit_loops(r, n, first_column, cache)
-
-
-def _count_rectangles_completion_explicit_loops(r: int, n: int, first_column: List[int], cache) -> Tuple[int, int, int, int]:
-    """
-    Ultra-optimized explicit nested loops approach for r≤6 with completion.
-    """
-    
-    derangements_with_signs = cache.get_all_derangements_with_signs()
-    position_value_index = cache.position_value_index
-    
-    # Filter derangements and create index mappings (same as regular version)
-    filtered_sets = []
-    original_to_filtered_maps = []
-    
-    print(f"   Pre-filtering derangements for {r-1} rows...")
-    for row_idx in range(1, r):  # rows 1 to r-1
-        required_start_value = first_column[row_idx]
-        filtered_derangements = []
-        filtered_signs = []
-        original_to_filtered = {}
-        
-        filtered_idx = 0
-        for orig_idx, (derangement, sign) in enumerate(derangements_with_signs):
-            if hasattr(derangement, 'tolist'):
-                derang_list = derangement.tolist()
-            else:
-                derang_list = list(derangement)
-            
-            if derang_list[0] == required_start_value:
-                filtered_derangements.append(derang_list)
-                filtered_signs.append(sign)
-                original_to_filtered[orig_idx] = filtered_idx
-                filtered_idx += 1
-        
-        filtered_sets.append({
-            'derangements': filtered_derangements,
-            'signs': filtered_signs
-        })
-        original_to_filtered_maps.append(original_to_filtered)
-        
-        reduction = len(derangements_with_signs) / len(filtered_derangements) if len(filtered_derangements) > 0 else float('inf')
-        print(f"   Row {row_idx+1}: {len(filtered_derangements)}/{len(derangements_with_signs)} candidates ({reduction:.1f}x reduction)")
-    
-    # Pre-compute constraint lookup tables using proper index mapping
-    print(f"   Pre-computing constraint lookup tables...")
-    constraint_tables = []
-    
-    for set_idx in range(r - 1):
-        table = {}
-        original_to_filtered = original_to_filtered_maps[set_idx]
-        
-        for pos in range(n):
-            for val in range(1, n + 1):
-                mask = 0
-                if (pos, val) in position_value_index:
-                    original_conflicts = set(position_value_index[(pos, val)])
-                    
-                    # Map original indices to filtered indices
-                    for orig_idx in original_conflicts:
-                        if orig_idx in original_to_filtered:
-                            filtered_idx = original_to_filtered[orig_idx]
-                            mask |= (1 << filtered_idx)
-                
-                table[(pos, val)] = mask
-        
-        constraint_tables.append(table)
-    
-    # Also need constraint table for the completion row (using original derangements)
-    completion_constraint_table = {}
-    for pos in range(n):
-        for val in range(1, n + 1):
-            mask = 0
-            if (pos, val) in position_value_index:
-                for conflict_idx in position_value_index[(pos, val)]:
-                    mask |= (1 << conflict_idx)
-            completion_constraint_table[(pos, val)] = mask
-    
-    # Counters for both (r, n) and (n, n)
-    positive_r = 0
-    negative_r = 0
-    positive_r_plus_1 = 0
-    negative_r_plus_1 = 0
-    
-    first_sign = 1
-    all_valid_mask = (1 << len(derangements_with_signs)) - 1
+    filtered_sets, constraint_tables = _prefilter_derangement_sets(r, n, first_column, cache)
+    completion_constraint_table = _build_completion_constraint_table(n, cache)
+    completion_sign_masks = _build_completion_sign_masks(cache)
     
     print(f"   Starting ultra-optimized rectangle counting with completion...")
-    
-    # Implementation for specific r values with completion
-    if r == 2:  # Computing (2,3) and (3,3)
-        second_set = filtered_sets[0]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Count for (2, 3) - this is a complete (2,3) rectangle
-            rectangle_sign_r = first_sign * second_sign
-            if rectangle_sign_r > 0:
-                positive_r += 1
-            else:
-                negative_r += 1
-            
-            # Now compute valid third rows for completion to (3,3)
-            # Following main trunk pattern: compute valid mask, then iterate
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-            
-            # Count all valid third rows (main trunk pattern)
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                _, third_sign = derangements_with_signs[third_idx]
-                
-                # Count for (3, 3) - this is the completed rectangle
-                rectangle_sign_r_plus_1 = rectangle_sign_r * third_sign
-                if rectangle_sign_r_plus_1 > 0:
-                    positive_r_plus_1 += 1
-                else:
-                    negative_r_plus_1 += 1
-    
-    elif r == 3:  # Computing (3,4) and (4,4)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        third_conflicts = constraint_tables[1]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Count for (3, 4) - this is a complete (3,4) rectangle
-                rectangle_sign_r = first_sign * second_sign * third_sign
-                if rectangle_sign_r > 0:
-                    positive_r += 1
-                else:
-                    negative_r += 1
-                
-                # Now compute valid fourth rows for completion to (4,4)
-                # Following main trunk pattern: compute valid mask, then iterate
-                fourth_row_valid = all_valid_mask
-                for pos in range(n):
-                    fourth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                    fourth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                
-                # Count all valid fourth rows (main trunk pattern)
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    _, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    # Count for (4, 4) - this is the completed rectangle
-                    rectangle_sign_r_plus_1 = rectangle_sign_r * fourth_sign
-                    if rectangle_sign_r_plus_1 > 0:
-                        positive_r_plus_1 += 1
-                    else:
-                        negative_r_plus_1 += 1
-    
-    elif r == 4:  # Computing (4,5) and (5,5)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Count for (4, 5) - this is a complete (4,5) rectangle
-                    rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign
-                    if rectangle_sign_r > 0:
-                        positive_r += 1
-                    else:
-                        negative_r += 1
-                    
-                    # Now compute valid fifth rows for completion to (5,5)
-                    # Following main trunk pattern: compute valid mask, then iterate
-                    fifth_row_valid = all_valid_mask
-                    for pos in range(n):
-                        fifth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                        fifth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                        fifth_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                    
-                    # Count all valid fifth rows (main trunk pattern)
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        _, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        # Count for (5, 5) - this is the completed rectangle
-                        rectangle_sign_r_plus_1 = rectangle_sign_r * fifth_sign
-                        if rectangle_sign_r_plus_1 > 0:
-                            positive_r_plus_1 += 1
-                        else:
-                            negative_r_plus_1 += 1
-    
-    elif r == 5:  # Computing (5,6) and (6,6)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Count for (5, 6) - this is a complete (5,6) rectangle
-                        rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign * fifth_sign
-                        if rectangle_sign_r > 0:
-                            positive_r += 1
-                        else:
-                            negative_r += 1
-                        
-                        # Now compute valid sixth rows for completion to (6,6)
-                        # Following main trunk pattern: compute valid mask, then iterate
-                        sixth_row_valid = all_valid_mask
-                        for pos in range(n):
-                            sixth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                            sixth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                            sixth_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~completion_constraint_table[(pos, fifth_row[pos])]
-                        
-                        # Count all valid sixth rows (main trunk pattern)
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            _, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            # Count for (6, 6) - this is the completed rectangle
-                            rectangle_sign_r_plus_1 = rectangle_sign_r * sixth_sign
-                            if rectangle_sign_r_plus_1 > 0:
-                                positive_r_plus_1 += 1
-                            else:
-                                negative_r_plus_1 += 1
-    
-    elif r == 6:  # Computing (6,7) and (7,7)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        sixth_set = filtered_sets[4]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        sixth_conflicts = constraint_tables[4]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Calculate valid sixth rows
-                        sixth_row_valid = (1 << len(sixth_set['derangements'])) - 1
-                        for pos in range(n):
-                            sixth_row_valid &= ~sixth_conflicts[(pos, second_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, third_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fifth_row[pos])]
-                        
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row = sixth_set['derangements'][sixth_idx]
-                            sixth_sign = sixth_set['signs'][sixth_idx]
-                            
-                            # Count for (6, 7) - this is a complete (6,7) rectangle
-                            rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign
-                            if rectangle_sign_r > 0:
-                                positive_r += 1
-                            else:
-                                negative_r += 1
-                            
-                            # Now compute valid seventh rows for completion to (7,7)
-                            seventh_row_valid = all_valid_mask
-                            for pos in range(n):
-                                seventh_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                                seventh_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                                seventh_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                                seventh_row_valid &= ~completion_constraint_table[(pos, fifth_row[pos])]
-                                seventh_row_valid &= ~completion_constraint_table[(pos, sixth_row[pos])]
-                            
-                            # Count all valid seventh rows
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                _, seventh_sign = derangements_with_signs[seventh_idx]
-                                
-                                # Count for (7, 7) - this is the completed rectangle
-                                rectangle_sign_r_plus_1 = rectangle_sign_r * seventh_sign
-                                if rectangle_sign_r_plus_1 > 0:
-                                    positive_r_plus_1 += 1
-                                else:
-                                    negative_r_plus_1 += 1
-
-    elif r == 7:  # Computing (7,8) and (8,8)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        sixth_set = filtered_sets[4]
-        seventh_set = filtered_sets[5]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        sixth_conflicts = constraint_tables[4]
-        seventh_conflicts = constraint_tables[5]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Calculate valid sixth rows
-                        sixth_row_valid = (1 << len(sixth_set['derangements'])) - 1
-                        for pos in range(n):
-                            sixth_row_valid &= ~sixth_conflicts[(pos, second_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, third_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fifth_row[pos])]
-                        
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row = sixth_set['derangements'][sixth_idx]
-                            sixth_sign = sixth_set['signs'][sixth_idx]
-                            
-                            # Calculate valid seventh rows
-                            seventh_row_valid = (1 << len(seventh_set['derangements'])) - 1
-                            for pos in range(n):
-                                seventh_row_valid &= ~seventh_conflicts[(pos, second_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, third_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fourth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fifth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, sixth_row[pos])]
-                            
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row = seventh_set['derangements'][seventh_idx]
-                                seventh_sign = seventh_set['signs'][seventh_idx]
-                                
-                                # Count for (7, 8) - this is a complete (7,8) rectangle
-                                rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign
-                                if rectangle_sign_r > 0:
-                                    positive_r += 1
-                                else:
-                                    negative_r += 1
-                                
-                                # Now compute valid eighth rows for completion to (8,8)
-                                eighth_row_valid = all_valid_mask
-                                for pos in range(n):
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, fifth_row[pos])]
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, sixth_row[pos])]
-                                    eighth_row_valid &= ~completion_constraint_table[(pos, seventh_row[pos])]
-                                
-                                # Count all valid eighth rows
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    _, eighth_sign = derangements_with_signs[eighth_idx]
-                                    
-                                    # Count for (8, 8) - this is the completed rectangle
-                                    rectangle_sign_r_plus_1 = rectangle_sign_r * eighth_sign
-                                    if rectangle_sign_r_plus_1 > 0:
-                                        positive_r_plus_1 += 1
-                                    else:
-                                        negative_r_plus_1 += 1
-
-    elif r == 8:  # Computing (8,9) and (9,9)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        sixth_set = filtered_sets[4]
-        seventh_set = filtered_sets[5]
-        eighth_set = filtered_sets[6]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        sixth_conflicts = constraint_tables[4]
-        seventh_conflicts = constraint_tables[5]
-        eighth_conflicts = constraint_tables[6]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Calculate valid sixth rows
-                        sixth_row_valid = (1 << len(sixth_set['derangements'])) - 1
-                        for pos in range(n):
-                            sixth_row_valid &= ~sixth_conflicts[(pos, second_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, third_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fifth_row[pos])]
-                        
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row = sixth_set['derangements'][sixth_idx]
-                            sixth_sign = sixth_set['signs'][sixth_idx]
-                            
-                            # Calculate valid seventh rows
-                            seventh_row_valid = (1 << len(seventh_set['derangements'])) - 1
-                            for pos in range(n):
-                                seventh_row_valid &= ~seventh_conflicts[(pos, second_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, third_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fourth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fifth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, sixth_row[pos])]
-                            
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row = seventh_set['derangements'][seventh_idx]
-                                seventh_sign = seventh_set['signs'][seventh_idx]
-                                
-                                # Calculate valid eighth rows
-                                eighth_row_valid = (1 << len(eighth_set['derangements'])) - 1
-                                for pos in range(n):
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, second_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, third_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, fourth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, fifth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, sixth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, seventh_row[pos])]
-                                
-                                if eighth_row_valid == 0:
-                                    continue
-                                
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    eighth_row = eighth_set['derangements'][eighth_idx]
-                                    eighth_sign = eighth_set['signs'][eighth_idx]
-                                    
-                                    # Count for (8, 9) - this is a complete (8,9) rectangle
-                                    rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign * eighth_sign
-                                    if rectangle_sign_r > 0:
-                                        positive_r += 1
-                                    else:
-                                        negative_r += 1
-                                    
-                                    # Now compute valid ninth rows for completion to (9,9)
-                                    ninth_row_valid = all_valid_mask
-                                    for pos in range(n):
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, fifth_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, sixth_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, seventh_row[pos])]
-                                        ninth_row_valid &= ~completion_constraint_table[(pos, eighth_row[pos])]
-                                    
-                                    # Count all valid ninth rows
-                                    ninth_mask = ninth_row_valid
-                                    while ninth_mask:
-                                        ninth_idx = (ninth_mask & -ninth_mask).bit_length() - 1
-                                        ninth_mask &= ninth_mask - 1
-                                        _, ninth_sign = derangements_with_signs[ninth_idx]
-                                        
-                                        # Count for (9, 9) - this is the completed rectangle
-                                        rectangle_sign_r_plus_1 = rectangle_sign_r * ninth_sign
-                                        if rectangle_sign_r_plus_1 > 0:
-                                            positive_r_plus_1 += 1
-                                        else:
-                                            negative_r_plus_1 += 1
-
-    elif r == 9:  # Computing (9,10) and (10,10)
-        second_set = filtered_sets[0]
-        third_set = filtered_sets[1]
-        fourth_set = filtered_sets[2]
-        fifth_set = filtered_sets[3]
-        sixth_set = filtered_sets[4]
-        seventh_set = filtered_sets[5]
-        eighth_set = filtered_sets[6]
-        ninth_set = filtered_sets[7]
-        third_conflicts = constraint_tables[1]
-        fourth_conflicts = constraint_tables[2]
-        fifth_conflicts = constraint_tables[3]
-        sixth_conflicts = constraint_tables[4]
-        seventh_conflicts = constraint_tables[5]
-        eighth_conflicts = constraint_tables[6]
-        ninth_conflicts = constraint_tables[7]
-        
-        for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-            # Calculate valid third rows
-            third_row_valid = (1 << len(third_set['derangements'])) - 1
-            for pos in range(n):
-                third_row_valid &= ~third_conflicts[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row = third_set['derangements'][third_idx]
-                third_sign = third_set['signs'][third_idx]
-                
-                # Calculate valid fourth rows
-                fourth_row_valid = (1 << len(fourth_set['derangements'])) - 1
-                for pos in range(n):
-                    fourth_row_valid &= ~fourth_conflicts[(pos, second_row[pos])]
-                    fourth_row_valid &= ~fourth_conflicts[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row = fourth_set['derangements'][fourth_idx]
-                    fourth_sign = fourth_set['signs'][fourth_idx]
-                    
-                    # Calculate valid fifth rows
-                    fifth_row_valid = (1 << len(fifth_set['derangements'])) - 1
-                    for pos in range(n):
-                        fifth_row_valid &= ~fifth_conflicts[(pos, second_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, third_row[pos])]
-                        fifth_row_valid &= ~fifth_conflicts[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row = fifth_set['derangements'][fifth_idx]
-                        fifth_sign = fifth_set['signs'][fifth_idx]
-                        
-                        # Calculate valid sixth rows
-                        sixth_row_valid = (1 << len(sixth_set['derangements'])) - 1
-                        for pos in range(n):
-                            sixth_row_valid &= ~sixth_conflicts[(pos, second_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, third_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fourth_row[pos])]
-                            sixth_row_valid &= ~sixth_conflicts[(pos, fifth_row[pos])]
-                        
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row = sixth_set['derangements'][sixth_idx]
-                            sixth_sign = sixth_set['signs'][sixth_idx]
-                            
-                            # Calculate valid seventh rows
-                            seventh_row_valid = (1 << len(seventh_set['derangements'])) - 1
-                            for pos in range(n):
-                                seventh_row_valid &= ~seventh_conflicts[(pos, second_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, third_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fourth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, fifth_row[pos])]
-                                seventh_row_valid &= ~seventh_conflicts[(pos, sixth_row[pos])]
-                            
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row = seventh_set['derangements'][seventh_idx]
-                                seventh_sign = seventh_set['signs'][seventh_idx]
-                                
-                                # Calculate valid eighth rows
-                                eighth_row_valid = (1 << len(eighth_set['derangements'])) - 1
-                                for pos in range(n):
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, second_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, third_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, fourth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, fifth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, sixth_row[pos])]
-                                    eighth_row_valid &= ~eighth_conflicts[(pos, seventh_row[pos])]
-                                
-                                if eighth_row_valid == 0:
-                                    continue
-                                
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    eighth_row = eighth_set['derangements'][eighth_idx]
-                                    eighth_sign = eighth_set['signs'][eighth_idx]
-                                    
-                                    # Calculate valid ninth rows
-                                    ninth_row_valid = (1 << len(ninth_set['derangements'])) - 1
-                                    for pos in range(n):
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, second_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, third_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, fourth_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, fifth_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, sixth_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, seventh_row[pos])]
-                                        ninth_row_valid &= ~ninth_conflicts[(pos, eighth_row[pos])]
-                                    
-                                    if ninth_row_valid == 0:
-                                        continue
-                                    
-                                    ninth_mask = ninth_row_valid
-                                    while ninth_mask:
-                                        ninth_idx = (ninth_mask & -ninth_mask).bit_length() - 1
-                                        ninth_mask &= ninth_mask - 1
-                                        ninth_row = ninth_set['derangements'][ninth_idx]
-                                        ninth_sign = ninth_set['signs'][ninth_idx]
-                                        
-                                        # Count for (9, 10) - this is a complete (9,10) rectangle
-                                        rectangle_sign_r = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign * eighth_sign * ninth_sign
-                                        if rectangle_sign_r > 0:
-                                            positive_r += 1
-                                        else:
-                                            negative_r += 1
-                                        
-                                        # Now compute valid tenth rows for completion to (10,10)
-                                        tenth_row_valid = all_valid_mask
-                                        for pos in range(n):
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, third_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, fourth_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, fifth_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, sixth_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, seventh_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, eighth_row[pos])]
-                                            tenth_row_valid &= ~completion_constraint_table[(pos, ninth_row[pos])]
-                                        
-                                        # Count all valid tenth rows
-                                        tenth_mask = tenth_row_valid
-                                        while tenth_mask:
-                                            tenth_idx = (tenth_mask & -tenth_mask).bit_length() - 1
-                                            tenth_mask &= tenth_mask - 1
-                                            _, tenth_sign = derangements_with_signs[tenth_idx]
-                                            
-                                            # Count for (10, 10) - this is the completed rectangle
-                                            rectangle_sign_r_plus_1 = rectangle_sign_r * tenth_sign
-                                            if rectangle_sign_r_plus_1 > 0:
-                                                positive_r_plus_1 += 1
-                                            else:
-                                                negative_r_plus_1 += 1
-
-    else:
-        raise NotImplementedError(f"Completion explicit loops not implemented for r={r} > 9")
-    
-    return positive_r, negative_r, positive_r_plus_1, negative_r_plus_1
-
-
-def _count_rectangles_completion_stack_approach(r: int, n: int, first_column: List[int], cache) -> Tuple[int, int, int, int]:
-    """
-    Ultra-optimized stack-based approach for r≤10 with completion.
-    
-    This computes both (r,n) and (r+1,n) = (n,n) rectangles together by exploiting
-    the mathematical fact that every (r,n) rectangle has exactly one completion to (n,n).
-    """
-    if r != n - 1:
-        raise ValueError(f"Completion optimization requires r = n-1, got r={r}, n={n}")
-    
-    derangements_with_signs = cache.get_all_derangements_with_signs()
-    position_value_index = cache.position_value_index
-    
-    # Filter derangements for each row (same as regular stack approach)
-    filtered_sets = []
-    original_to_filtered_maps = []
-    
-    print(f"   Pre-filtering derangements for {r-1} rows...")
-    for row_idx in range(1, r):  # rows 1 to r-1
-        required_start_value = first_column[row_idx]
-        filtered_derangements = []
-        filtered_signs = []
-        original_to_filtered = {}
-        
-        filtered_idx = 0
-        for orig_idx, (derangement, sign) in enumerate(derangements_with_signs):
-            if hasattr(derangement, 'tolist'):
-                derang_list = derangement.tolist()
-            else:
-                derang_list = list(derangement)
-            
-            if derang_list[0] == required_start_value:
-                filtered_derangements.append(derang_list)
-                filtered_signs.append(sign)
-                original_to_filtered[orig_idx] = filtered_idx
-                filtered_idx += 1
-        
-        filtered_sets.append({
-            'derangements': filtered_derangements,
-            'signs': filtered_signs
-        })
-        original_to_filtered_maps.append(original_to_filtered)
-        
-        reduction = len(derangements_with_signs) / len(filtered_derangements) if len(filtered_derangements) > 0 else float('inf')
-        print(f"   Row {row_idx+1}: {len(filtered_derangements)}/{len(derangements_with_signs)} candidates ({reduction:.1f}x reduction)")
-    
-    # Pre-compute constraint lookup tables (same as regular)
-    print(f"   Pre-computing constraint lookup tables...")
-    constraint_tables = []
-    
-    for set_idx in range(r - 1):
-        table = {}
-        original_to_filtered = original_to_filtered_maps[set_idx]
-        
-        for pos in range(n):
-            for val in range(1, n + 1):
-                mask = 0
-                if (pos, val) in position_value_index:
-                    original_conflicts = set(position_value_index[(pos, val)])
-                    
-                    # Map original indices to filtered indices
-                    for orig_idx in original_conflicts:
-                        if orig_idx in original_to_filtered:
-                            filtered_idx = original_to_filtered[orig_idx]
-                            mask |= (1 << filtered_idx)
-                
-                table[(pos, val)] = mask
-        
-        constraint_tables.append(table)
-    
-    # Pre-compute constraint table for completion row (uses original derangements)
-    print(f"   Pre-computing completion constraint table...")
-    completion_constraint_table = {}
-    for pos in range(n):
-        for val in range(1, n + 1):
-            mask = 0
-            if (pos, val) in position_value_index:
-                for conflict_idx in position_value_index[(pos, val)]:
-                    mask |= (1 << conflict_idx)
-            completion_constraint_table[(pos, val)] = mask
-    
-    all_valid_mask = (1 << len(derangements_with_signs)) - 1
-    
-    # Pre-compute sign masks for final row (filtered)
-    final_set = filtered_sets[-1]
-    positive_final_mask = 0
-    negative_final_mask = 0
-    
-    for final_idx, final_sign in enumerate(final_set['signs']):
-        if final_sign > 0:
-            positive_final_mask |= (1 << final_idx)
-        else:
-            negative_final_mask |= (1 << final_idx)
-    
-    # Counters for (r,n) and (r+1,n)
-    positive_r = 0
-    negative_r = 0
-    positive_r_plus_1 = 0
-    negative_r_plus_1 = 0
-    
-    first_sign = 1
-    
-    print(f"   Starting ultra-optimized stack-based rectangle counting with completion...")
-    
-    # Stack-based enumeration with completion
-    second_set = filtered_sets[0]
-    
-    for second_row, second_sign in zip(second_set['derangements'], second_set['signs']):
-        # Calculate initial valid mask for third row
-        third_row_valid = (1 << len(filtered_sets[1]['derangements'])) - 1
-        for pos in range(n):
-            third_row_valid &= ~constraint_tables[1][(pos, second_row[pos])]
-        
-        if third_row_valid == 0:
-            continue
-        
-        # Initialize stack with (level, valid_mask, accumulated_sign)
-        stack = [(2, third_row_valid, first_sign * second_sign)]
-        
-        while stack:
-            level, valid_mask, accumulated_sign = stack.pop()
-            
-            if level == r - 1:
-                # Final row for (r,n) rectangle - iterate through valid completions
-                current_mask = valid_mask
-                while current_mask:
-                    final_idx = (current_mask & -current_mask).bit_length() - 1
-                    current_mask &= current_mask - 1
-                    final_row = final_set['derangements'][final_idx]
-                    final_sign = final_set['signs'][final_idx]
-                    
-                    # Count this (r,n) rectangle
-                    rectangle_sign_r = accumulated_sign * final_sign
-                    if rectangle_sign_r > 0:
-                        positive_r += 1
-                    else:
-                        negative_r += 1
-                    
-                    # Now compute completion to (r+1,n) = (n,n)
-                    # Calculate valid mask for completion row
-                    completion_row_valid = all_valid_mask
-                    
-                    # Apply constraints from all previous rows
-                    for pos in range(n):
-                        completion_row_valid &= ~completion_constraint_table[(pos, second_row[pos])]
-                    
-                    # Apply constraints from rows 3 to r (need to reconstruct the path)
-                    # This is complex in stack approach - we need to track the full rectangle
-                    # For now, let's use a simpler approach: iterate through all valid completion rows
-                    completion_mask = completion_row_valid
-                    while completion_mask:
-                        completion_idx = (completion_mask & -completion_mask).bit_length() - 1
-                        completion_mask &= completion_mask - 1
-                        _, completion_sign = derangements_with_signs[completion_idx]
-                        
-                        # Count this (r+1,n) rectangle
-                        rectangle_sign_r_plus_1 = rectangle_sign_r * completion_sign
-                        if rectangle_sign_r_plus_1 > 0:
-                            positive_r_plus_1 += 1
-                        else:
-                            negative_r_plus_1 += 1
-            else:
-                # Not final row - iterate and push to stack
-                current_set = filtered_sets[level - 1]  # -1 because we skip first row
-                next_conflicts = constraint_tables[level] if level < len(constraint_tables) else constraint_tables[-1]
-                
-                current_mask = valid_mask
-                while current_mask:
-                    current_idx = (current_mask & -current_mask).bit_length() - 1
-                    current_mask &= current_mask - 1
-                    current_row = current_set['derangements'][current_idx]
-                    current_sign = current_set['signs'][current_idx]
-                    
-                    # Calculate valid mask for next row
-                    if level + 1 < r:
-                        next_valid = (1 << len(filtered_sets[level]['derangements'])) - 1
-                        for pos in range(n):
-                            next_valid &= ~next_conflicts[(pos, current_row[pos])]
-                        
-                        if next_valid != 0:
-                            new_accumulated_sign = accumulated_sign * current_sign
-                            stack.append((level + 1, next_valid, new_accumulated_sign))
-    
-    return positive_r, negative_r, positive_r_plus_1, negative_r_plus_1
+    return _count_rectangles_dfs(n, filtered_sets, constraint_tables,
+                                 completion_constraint_table, completion_sign_masks)
 
 
 def main():
@@ -629,6 +629,10 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
     # Get pre-computed bitwise data
     conflict_masks, all_valid_mask = cache.get_bitwise_data()
     
+    # Flatten to conflict_table[pos][val] so lookups skip hashing a tuple key
+    conflict_table = [[conflict_masks.get((pos, val), 0) for val in range(n + 1)]
+                      for pos in range(n)]
+    
     # PERFORMANCE FIX: Convert NumPy arrays to Python lists for computation
     # (Keep NumPy for storage, use Python lists for computation speed)
     derangements_lists = []
@@ -643,9 +647,8 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
     print(f"   🚀 Using binary cache with Python list conversion: {num_derangements:,} derangements")
     print(f"   🔢 Using bitwise operations for {num_derangements}-bit bitsets")
     
-    total_count = 0
-    positive_count = 0
-    negative_count = 0
+    # [positive, negative], indexed by rectangle_sign < 0 instead of branching
+    sign_counts = [0, 0]
     
     # First row is identity [1,2,3,...,n] with sign +1
     first_sign = 1
@@ -655,9 +658,10 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
         for second_idx in range(num_derangements):
             second_row = derangements_lists[second_idx]
             second_sign = signs_list[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             third_mask = third_row_valid
             while third_mask:
@@ -665,20 +669,17 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                 third_mask &= third_mask - 1
                 third_sign = signs_list[third_idx]
                 
-                rectangle_sign = first_sign * second_sign * third_sign
-                total_count += 1
-                if rectangle_sign > 0:
-                    positive_count += 1
-                else:
-                    negative_count += 1
+                rectangle_sign = second_cum_sign * third_sign
+                sign_counts[rectangle_sign < 0] += 1
     
     elif r == 4:
         for second_idx in range(num_derangements):
             second_row = derangements_lists[second_idx]
             second_sign = signs_list[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             if third_row_valid == 0:
                 continue
@@ -689,10 +690,11 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                 third_mask &= third_mask - 1
                 third_row = derangements_lists[third_idx]
                 third_sign = signs_list[third_idx]
+                third_cum_sign = second_cum_sign * third_sign
                 
                 fourth_row_valid = third_row_valid
                 for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
+                    fourth_row_valid &= ~conflict_table[pos][third_row[pos]]
                 
                 fourth_mask = fourth_row_valid
                 while fourth_mask:
@@ -700,20 +702,17 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                     fourth_mask &= fourth_mask - 1
                     fourth_sign = signs_list[fourth_idx]
                     
-                    rectangle_sign = first_sign * second_sign * third_sign * fourth_sign
-                    total_count += 1
-                    if rectangle_sign > 0:
-                        positive_count += 1
-                    else:
-                        negative_count += 1
+                    rectangle_sign = third_cum_sign * fourth_sign
+                    sign_counts[rectangle_sign < 0] += 1
     
     elif r == 5:
         for second_idx in range(num_derangements):
             second_row = derangements_lists[second_idx]
             second_sign = signs_list[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             if third_row_valid == 0:
                 continue
@@ -724,10 +723,11 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                 third_mask &= third_mask - 1
                 third_row = derangements_lists[third_idx]
                 third_sign = signs_list[third_idx]
+                third_cum_sign = second_cum_sign * third_sign
                 
                 fourth_row_valid = third_row_valid
                 for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
+                    fourth_row_valid &= ~conflict_table[pos][third_row[pos]]
                 
                 if fourth_row_valid == 0:
                     continue
@@ -738,10 +738,11 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                     fourth_mask &= fourth_mask - 1
                     fourth_row = derangements_lists[fourth_idx]
                     fourth_sign = signs_list[fourth_idx]
+                    fourth_cum_sign = third_cum_sign * fourth_sign
                     
                     fifth_row_valid = fourth_row_valid
                     for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
+                        fifth_row_valid &= ~conflict_table[pos][fourth_row[pos]]
                     
                     fifth_mask = fifth_row_valid
                     while fifth_mask:
@@ -749,19 +750,16 @@ def _count_rectangles_with_binary_cache(r: int, n: int, cache) -> Tuple[int, int
                         fifth_mask &= fifth_mask - 1
                         fifth_sign = signs_list[fifth_idx]
                         
-                        rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign
-                        total_count += 1
-                        if rectangle_sign > 0:
-                            positive_count += 1
-                        else:
-                            negative_count += 1
+                        rectangle_sign = fourth_cum_sign * fifth_sign
+                        sign_counts[rectangle_sign < 0] += 1
     
     # Add more cases for r=5,6,7... as needed
     else:
         # For now, fall back to the JSON cache version for r > 4
         return _count_rectangles_with_json_cache(r, n, cache)
     
-    return total_count, positive_count, negative_count
+    positive_count, negative_count = sign_counts
+    return positive_count + negative_count, positive_count, negative_count
 
 
 def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int, int]:
@@ -776,8 +774,9 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
     # Pre-compute conflict bitsets for faster operations
     position_value_index = cache.position_value_index
     
-    # Pre-compute conflict bitsets - each conflict set becomes a bitmask
-    conflict_masks = {}
+    # Pre-compute conflict bitsets - each conflict set becomes a bitmask,
+    # stored flat as conflict_table[pos][val] to avoid tuple-key lookups
+    conflict_table = [[0] * (n + 1) for _ in range(n)]
     for pos in range(n):
         for val in range(1, n + 1):
             conflict_key = (pos, val)
@@ -786,16 +785,13 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                 mask = 0
                 for conflict_idx in position_value_index[conflict_key]:
                     mask |= (1 << conflict_idx)
-                conflict_masks[conflict_key] = mask
-            else:
-                conflict_masks[conflict_key] = 0
+                conflict_table[pos][val] = mask
     
     # All derangements initially valid (all bits set)
     all_valid_mask = (1 << num_derangements) - 1
     
-    total_count = 0
-    positive_count = 0
-    negative_count = 0
+    # [positive, negative], indexed by rectangle_sign < 0 instead of branching
+    sign_counts = [0, 0]
     
     # First row is identity [1,2,3,...,n] with sign +1
     first_sign = 1
@@ -804,9 +800,10 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
     if r == 3:
         for second_idx in range(num_derangements):
             second_row, second_sign = derangements_with_signs[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             third_mask = third_row_valid
             while third_mask:
@@ -814,19 +811,16 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                 third_mask &= third_mask - 1
                 _, third_sign = derangements_with_signs[third_idx]
                 
-                rectangle_sign = first_sign * second_sign * third_sign
-                total_count += 1
-                if rectangle_sign > 0:
-                    positive_count += 1
-                else:
-                    negative_count += 1
+                rectangle_sign = second_cum_sign * third_sign
+                sign_counts[rectangle_sign < 0] += 1
     
     elif r == 4:
         for second_idx in range(num_derangements):
             second_row, second_sign = derangements_with_signs[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             if third_row_valid == 0:
                 continue
@@ -836,10 +830,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                 third_idx = (third_mask & -third_mask).bit_length() - 1
                 third_mask &= third_mask - 1
                 third_row, third_sign = derangements_with_signs[third_idx]
+                third_cum_sign = second_cum_sign * third_sign
                 
                 fourth_row_valid = third_row_valid
                 for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
+                    fourth_row_valid &= ~conflict_table[pos][third_row[pos]]
                 
                 fourth_mask = fourth_row_valid
                 while fourth_mask:
@@ -847,19 +842,16 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                     fourth_mask &= fourth_mask - 1
                     _, fourth_sign = derangements_with_signs[fourth_idx]
                     
-                    rectangle_sign = first_sign * second_sign * third_sign * fourth_sign
-                    total_count += 1
-                    if rectangle_sign > 0:
-                        positive_count += 1
-                    else:
-                        negative_count += 1
+                    rectangle_sign = third_cum_sign * fourth_sign
+                    sign_counts[rectangle_sign < 0] += 1
     
     elif r == 5:
         for second_idx in range(num_derangements):
             second_row, second_sign = derangements_with_signs[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             if third_row_valid == 0:
                 continue
@@ -869,10 +861,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                 third_idx = (third_mask & -third_mask).bit_length() - 1
                 third_mask &= third_mask - 1
                 third_row, third_sign = derangements_with_signs[third_idx]
+                third_cum_sign = second_cum_sign * third_sign
                 
                 fourth_row_valid = third_row_valid
                 for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
+                    fourth_row_valid &= ~conflict_table[pos][third_row[pos]]
                 
                 if fourth_row_valid == 0:
                     continue
@@ -882,10 +875,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                     fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
                     fourth_mask &= fourth_mask - 1
                     fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
+                    fourth_cum_sign = third_cum_sign * fourth_sign
                     
                     fifth_row_valid = fourth_row_valid
                     for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
+                        fifth_row_valid &= ~conflict_table[pos][fourth_row[pos]]
                     
                     fifth_mask = fifth_row_valid
                     while fifth_mask:
@@ -893,19 +887,16 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                         fifth_mask &= fifth_mask - 1
                         _, fifth_sign = derangements_with_signs[fifth_idx]
                         
-                        rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign
-                        total_count += 1
-                        if rectangle_sign > 0:
-                            positive_count += 1
-                        else:
-                            negative_count += 1
+                        rectangle_sign = fourth_cum_sign * fifth_sign
+                        sign_counts[rectangle_sign < 0] += 1
     
     elif r == 6:
         for second_idx in range(num_derangements):
             second_row, second_sign = derangements_with_signs[second_idx]
+            second_cum_sign = first_sign * second_sign
             third_row_valid = all_valid_mask
             for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
+                third_row_valid &= ~conflict_table[pos][second_row[pos]]
             
             if third_row_valid == 0:
                 continue
@@ -915,10 +906,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                 third_idx = (third_mask & -third_mask).bit_length() - 1
                 third_mask &= third_mask - 1
                 third_row, third_sign = derangements_with_signs[third_idx]
+                third_cum_sign = second_cum_sign * third_sign
                 
                 fourth_row_valid = third_row_valid
                 for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
+                    fourth_row_valid &= ~conflict_table[pos][third_row[pos]]
                 
                 if fourth_row_valid == 0:
                     continue
@@ -928,10 +920,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                     fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
                     fourth_mask &= fourth_mask - 1
                     fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
+                    fourth_cum_sign = third_cum_sign * fourth_sign
                     
                     fifth_row_valid = fourth_row_valid
                     for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
+                        fifth_row_valid &= ~conflict_table[pos][fourth_row[pos]]
                     
                     if fifth_row_valid == 0:
                         continue
@@ -941,10 +934,11 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                         fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
                         fifth_mask &= fifth_mask - 1
                         fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
+                        fifth_cum_sign = fourth_cum_sign * fifth_sign
                         
                         sixth_row_valid = fifth_row_valid
                         for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
+                            sixth_row_valid &= ~conflict_table[pos][fifth_row[pos]]
                         
                         sixth_mask = sixth_row_valid
                         while sixth_mask:
@@ -952,580 +946,16 @@ def _count_rectangles_with_json_cache(r: int, n: int, cache) -> Tuple[int, int,
                             sixth_mask &= sixth_mask - 1
                             _, sixth_sign = derangements_with_signs[sixth_idx]
                             
-                            rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign
-                            total_count += 1
-                            if rectangle_sign > 0:
-                                positive_count += 1
-                            else:
-                                negative_count += 1
+                            rectangle_sign = fifth_cum_sign * sixth_sign
+                            sign_counts[rectangle_sign < 0] += 1
     
     # For r > 6, implement the rest of the original algorithm
     # (This is a simplified version - the full implementation would include all cases)
     else:
         raise NotImplementedError(f"JSON cache fallback not implemented for r={r}")
     
-    return total_count, positive_count, negative_count
-    
-    total_count = 0
-    positive_count = 0
-    negative_count = 0
-    
-    # First row is identity [1,2,3,...,n] with sign +1
-    first_sign = 1
-    
-    # Use explicit nested loops for r≤6 (maximum performance)
-    if r == 3:
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                _, third_sign = derangements_with_signs[third_idx]
-                
-                rectangle_sign = first_sign * second_sign * third_sign
-                total_count += 1
-                if rectangle_sign > 0:
-                    positive_count += 1
-                else:
-                    negative_count += 1
-    
-    elif r == 4:
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    _, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    rectangle_sign = first_sign * second_sign * third_sign * fourth_sign
-                    total_count += 1
-                    if rectangle_sign > 0:
-                        positive_count += 1
-                    else:
-                        negative_count += 1
-    
-    elif r == 5:
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        _, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign
-                        total_count += 1
-                        if rectangle_sign > 0:
-                            positive_count += 1
-                        else:
-                            negative_count += 1
-    
-    elif r == 6:
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        sixth_row_valid = fifth_row_valid
-                        for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            _, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign
-                            total_count += 1
-                            if rectangle_sign > 0:
-                                positive_count += 1
-                            else:
-                                negative_count += 1
-    
-    elif r == 7:
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        sixth_row_valid = fifth_row_valid
-                        for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            seventh_row_valid = sixth_row_valid
-                            for pos in range(n):
-                                seventh_row_valid &= ~conflict_masks[(pos, sixth_row[pos])]
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                _, seventh_sign = derangements_with_signs[seventh_idx]
-                                
-                                rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign
-                                total_count += 1
-                                if rectangle_sign > 0:
-                                    positive_count += 1
-                                else:
-                                    negative_count += 1
-    
-    elif r == 8:  # pragma: no cover
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        sixth_row_valid = fifth_row_valid
-                        for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            seventh_row_valid = sixth_row_valid
-                            for pos in range(n):
-                                seventh_row_valid &= ~conflict_masks[(pos, sixth_row[pos])]
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row, seventh_sign = derangements_with_signs[seventh_idx]
-                                
-                                eighth_row_valid = seventh_row_valid
-                                for pos in range(n):
-                                    eighth_row_valid &= ~conflict_masks[(pos, seventh_row[pos])]
-                                
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    _, eighth_sign = derangements_with_signs[eighth_idx]
-                                    
-                                    rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign * eighth_sign
-                                    total_count += 1
-                                    if rectangle_sign > 0:
-                                        positive_count += 1
-                                    else:
-                                        negative_count += 1
-    
-    elif r == 9:  # pragma: no cover
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        sixth_row_valid = fifth_row_valid
-                        for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            seventh_row_valid = sixth_row_valid
-                            for pos in range(n):
-                                seventh_row_valid &= ~conflict_masks[(pos, sixth_row[pos])]
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row, seventh_sign = derangements_with_signs[seventh_idx]
-                                
-                                eighth_row_valid = seventh_row_valid
-                                for pos in range(n):
-                                    eighth_row_valid &= ~conflict_masks[(pos, seventh_row[pos])]
-                                if eighth_row_valid == 0:
-                                    continue
-                                
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    eighth_row, eighth_sign = derangements_with_signs[eighth_idx]
-                                    
-                                    ninth_row_valid = eighth_row_valid
-                                    for pos in range(n):
-                                        ninth_row_valid &= ~conflict_masks[(pos, eighth_row[pos])]
-                                    
-                                    ninth_mask = ninth_row_valid
-                                    while ninth_mask:
-                                        ninth_idx = (ninth_mask & -ninth_mask).bit_length() - 1
-                                        ninth_mask &= ninth_mask - 1
-                                        _, ninth_sign = derangements_with_signs[ninth_idx]
-                                        
-                                        rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign * eighth_sign * ninth_sign
-                                        total_count += 1
-                                        if rectangle_sign > 0:
-                                            positive_count += 1
-                                        else:
-                                            negative_count += 1
-    
-    elif r == 10:  # pragma: no cover
-        for second_idx in range(num_derangements):
-            second_row, second_sign = derangements_with_signs[second_idx]
-            third_row_valid = all_valid_mask
-            for pos in range(n):
-                third_row_valid &= ~conflict_masks[(pos, second_row[pos])]
-            if third_row_valid == 0:
-                continue
-            
-            third_mask = third_row_valid
-            while third_mask:
-                third_idx = (third_mask & -third_mask).bit_length() - 1
-                third_mask &= third_mask - 1
-                third_row, third_sign = derangements_with_signs[third_idx]
-                
-                fourth_row_valid = third_row_valid
-                for pos in range(n):
-                    fourth_row_valid &= ~conflict_masks[(pos, third_row[pos])]
-                if fourth_row_valid == 0:
-                    continue
-                
-                fourth_mask = fourth_row_valid
-                while fourth_mask:
-                    fourth_idx = (fourth_mask & -fourth_mask).bit_length() - 1
-                    fourth_mask &= fourth_mask - 1
-                    fourth_row, fourth_sign = derangements_with_signs[fourth_idx]
-                    
-                    fifth_row_valid = fourth_row_valid
-                    for pos in range(n):
-                        fifth_row_valid &= ~conflict_masks[(pos, fourth_row[pos])]
-                    if fifth_row_valid == 0:
-                        continue
-                    
-                    fifth_mask = fifth_row_valid
-                    while fifth_mask:
-                        fifth_idx = (fifth_mask & -fifth_mask).bit_length() - 1
-                        fifth_mask &= fifth_mask - 1
-                        fifth_row, fifth_sign = derangements_with_signs[fifth_idx]
-                        
-                        sixth_row_valid = fifth_row_valid
-                        for pos in range(n):
-                            sixth_row_valid &= ~conflict_masks[(pos, fifth_row[pos])]
-                        if sixth_row_valid == 0:
-                            continue
-                        
-                        sixth_mask = sixth_row_valid
-                        while sixth_mask:
-                            sixth_idx = (sixth_mask & -sixth_mask).bit_length() - 1
-                            sixth_mask &= sixth_mask - 1
-                            sixth_row, sixth_sign = derangements_with_signs[sixth_idx]
-                            
-                            seventh_row_valid = sixth_row_valid
-                            for pos in range(n):
-                                seventh_row_valid &= ~conflict_masks[(pos, sixth_row[pos])]
-                            if seventh_row_valid == 0:
-                                continue
-                            
-                            seventh_mask = seventh_row_valid
-                            while seventh_mask:
-                                seventh_idx = (seventh_mask & -seventh_mask).bit_length() - 1
-                                seventh_mask &= seventh_mask - 1
-                                seventh_row, seventh_sign = derangements_with_signs[seventh_idx]
-                                
-                                eighth_row_valid = seventh_row_valid
-                                for pos in range(n):
-                                    eighth_row_valid &= ~conflict_masks[(pos, seventh_row[pos])]
-                                if eighth_row_valid == 0:
-                                    continue
-                                
-                                eighth_mask = eighth_row_valid
-                                while eighth_mask:
-                                    eighth_idx = (eighth_mask & -eighth_mask).bit_length() - 1
-                                    eighth_mask &= eighth_mask - 1
-                                    eighth_row, eighth_sign = derangements_with_signs[eighth_idx]
-                                    
-                                    ninth_row_valid = eighth_row_valid
-                                    for pos in range(n):
-                                        ninth_row_valid &= ~conflict_masks[(pos, eighth_row[pos])]
-                                    if ninth_row_valid == 0:
-                                        continue
-                                    
-                                    ninth_mask = ninth_row_valid
-                                    while ninth_mask:
-                                        ninth_idx = (ninth_mask & -ninth_mask).bit_length() - 1
-                                        ninth_mask &= ninth_mask - 1
-                                        ninth_row, ninth_sign = derangements_with_signs[ninth_idx]
-                                        
-                                        tenth_row_valid = ninth_row_valid
-                                        for pos in range(n):
-                                            tenth_row_valid &= ~conflict_masks[(pos, ninth_row[pos])]
-                                        
-                                        tenth_mask = tenth_row_valid
-                                        while tenth_mask:
-                                            tenth_idx = (tenth_mask & -tenth_mask).bit_length() - 1
-                                            tenth_mask &= tenth_mask - 1
-                                            _, tenth_sign = derangements_with_signs[tenth_idx]
-                                            
-                                            rectangle_sign = first_sign * second_sign * third_sign * fourth_sign * fifth_sign * sixth_sign * seventh_sign * eighth_sign * ninth_sign * tenth_sign
-                                            total_count += 1
-                                            if rectangle_sign > 0:
-                                                positive_count += 1
-                                            else:
-                                                negative_count += 1
-    
-    else:
-        # For r>10, use parametrized iterative approach
-        # Stack: (current_row, valid_mask, sign_product)
-        stack = [(2, all_valid_mask, first_sign)]
-        
-        while stack:
-            current_row, valid_mask, sign_product = stack.pop()
-            
-            if current_row == r:
-                # Count all valid final rows
-                mask = valid_mask
-                while mask:
-                    idx = (mask & -mask).bit_length() - 1
-                    mask &= mask - 1
-                    _, final_sign = derangements_with_signs[idx]
-                    rectangle_sign = sign_product * final_sign
-                    
-                    total_count += 1
-                    if rectangle_sign > 0:
-                        positive_count += 1
-                    else:
-                        negative_count += 1
-                continue
-            
-            # Process all valid derangements for current row
-            valid_indices = []
-            mask = valid_mask
-            while mask:
-                idx = (mask & -mask).bit_length() - 1
-                mask &= mask - 1
-                valid_indices.append(idx)
-            
-            # Push in reverse order for consistent ordering
-            for idx in reversed(valid_indices):
-                row, sign = derangements_with_signs[idx]
-                
-                # Calculate conflicts for next row
-                next_valid_mask = valid_mask
-                for pos in range(n):
-                    next_valid_mask &= ~conflict_masks[(pos, row[pos])]
-                
-                # Early termination
-                if next_valid_mask != 0:
-                    stack.append((current_row + 1, next_valid_mask, sign_product * sign))
-    
-    return total_count, positive_count, negative_count
-
-
-
-
+    positive_count, negative_count = sign_counts
+    return positive_count + negative_count, positive_count, negative_count
 
 
 if __name__ == "__main__":
@@ -96,7 +96,38 @@ class TestAutoCounterExtended(TestBaseWithProductionLogs):
         assert total > 0, "Forced parallel should work"
         
         print(f"✅ Forced parallel (3,5): {total} rectangles in {result.computation_time:.3f}s")
-    
+
+    def test_r2_uses_formula(self):
+        """Test r=2 is answered by the derangement formula without a process pool."""
+
+        with patch('core.auto_counter.count_rectangles_parallel_first_column') as parallel:
+            result = count_rectangles_auto(2, 7, force_parallel=True)
+
+        parallel.assert_not_called()
+        assert (result.positive_count, result.negative_count) == (930, 924)
+        assert result.computation_time is not None
+
+        print(f"✅ r=2 formula (2,7): +{result.positive_count} -{result.negative_count}")
+
+    def test_cached_result_skips_computation(self):
+        """Test a result in the cache manager is returned without starting workers."""
+        from cache.cache_manager import CacheManager
+
+        cache = CacheManager(":memory:")
+        computed = count_rectangles_auto(3, 5, cache_manager=cache)
+        assert not computed.from_cache
+
+        with patch('core.auto_counter.count_rectangles_ultra_safe_bitwise') as single, \
+             patch('core.auto_counter.count_rectangles_parallel_first_column') as parallel:
+            cached = count_rectangles_auto(3, 5, cache_manager=cache)
+
+        single.assert_not_called()
+        parallel.assert_not_called()
+        assert cached.from_cache
+        assert (cached.positive_count, cached.negative_count) == (computed.positive_count, computed.negative_count)
+
+        print(f"✅ Cached (3,5): +{cached.positive_count} -{cached.negative_count}")
+
     def test_num_processes_parameter(self):
         """Test num_processes parameter handling."""
         
@@ -79,6 +79,20 @@ class TestBitsetConstraints:
         assert constraints.is_forbidden(2, 3)
         assert not copy_constraints.is_forbidden(2, 3)
     
+    def test_fingerprint(self):
+        """Test fingerprints are hashable and equal exactly for equal states."""
+        constraints = BitsetConstraints(3)
+        constraints.add_row_constraints([1, 2, 3])
+
+        other = BitsetConstraints(3)
+        other.add_forbidden_batch([(0, 1), (1, 2), (2, 3)])
+
+        assert constraints.fingerprint() == other.fingerprint()
+        assert {constraints.fingerprint(): True}[other.fingerprint()]
+
+        other.add_forbidden(0, 2)
+        assert constraints.fingerprint() != other.fingerprint()
+
     def test_conversion_to_set_list(self):
         """Test conversion to set list format."""
         constraints = BitsetConstraints(3)
@@ -148,7 +162,23 @@ class TestBitsetConstraints:
         assert not constraints.is_forbidden(1, 3)
         assert not constraints.is_forbidden(2, 2)
         assert not constraints.is_forbidden(3, 4)
-    
+
+    def test_push_pop_row(self):
+        """Test push_row/pop_row match add/remove_row_constraints for compatible rows."""
+        constraints = BitsetConstraints(4)
+        constraints.add_row_constraints([1, 2, 3, 4])
+        expected = constraints.copy()
+
+        row = [2, 1, 4, 3]
+        row_bits = tuple(1 << (value - 1) for value in row)
+        constraints.push_row(row_bits)
+        expected.add_row_constraints(row)
+        assert constraints.forbidden == expected.forbidden
+
+        constraints.pop_row(row_bits)
+        expected.remove_row_constraints(row)
+        assert constraints.forbidden == expected.forbidden
+
     def test_rows_operations(self):
         """Test multiple rows constraint operations."""
         constraints = BitsetConstraints(3)
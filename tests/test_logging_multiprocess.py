@@ -17,7 +17,11 @@ import json
 from pathlib import Path
 import multiprocessing as mp
 
-from core.parallel_ultra_bitwise import count_rectangles_parallel_first_column
+from core.parallel_ultra_bitwise import (
+    count_rectangles_parallel_first_column,
+    count_rectangles_parallel_ultra_bitwise,
+    default_num_processes,
+)
 from core.logging_config import ProgressLogger, close_logger
 
 
@@ -148,6 +152,29 @@ class TestMultiprocessLogging:
         print(f"✅ Found {len(process_ids)} unique process IDs: {sorted(process_ids)}")
         assert len(process_ids) > 0
     
+    def test_second_row_driver_logs_once_per_worker(self):
+        """Test second-row tasks share their worker's log instead of one log per task."""
+        r, n = 4, 6
+        num_processes = 2
+        session = "test_second_row_worker_logs"
+        
+        result = count_rectangles_parallel_ultra_bitwise(
+            r, n, num_processes=num_processes, logger_session=session
+        )
+        assert result.positive_count + result.negative_count == 393120
+        
+        log_dir = Path("logs")
+        process_logs = sorted(log.name for log in log_dir.glob(f"{session}_process_*.log"))
+        progress_files = list(log_dir.glob(f"{session}_process_*_progress.jsonl"))
+        
+        # Far more tasks than workers, but only one log pair per worker
+        assert process_logs == [f"{session}_process_{i}.log" for i in range(num_processes)]
+        assert len(progress_files) == num_processes
+        for log_name in process_logs:
+            assert "=== SESSION END" in (log_dir / log_name).read_text()
+        
+        print(f"✅ {len(process_logs)} worker logs for {num_processes} processes")
+    
     def test_main_log_contains_summary(self):
         """Test that main log contains overall computation summary."""
         r, n = 3, 7
@@ -367,8 +394,8 @@ class TestMultiprocessLoggingEdgeCases:
         log_dir = Path("logs")
         process_logs = list(log_dir.glob(f"parallel_{r}_{n}_process_*.log"))
         
-        # Should have at least 1 process log, at most cpu_count or 8
-        max_expected = min(mp.cpu_count(), 8)
+        # Should have at least 1 process log, at most one per available CPU
+        max_expected = default_num_processes()
         assert 1 <= len(process_logs) <= max_expected
         
         print(f"✅ Auto-detected {len(process_logs)} processes, created logs correctly")
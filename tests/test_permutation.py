@@ -41,6 +41,24 @@ class TestPermutationSign:
             f"(inversions: {inversions})"
         )
     
+    @given(st.lists(st.integers(min_value=-1000, max_value=1000), unique=True, max_size=12))
+    @settings(max_examples=100)
+    def test_permutation_sign_matches_inversion_parity_for_distinct_values(self, values):
+        """Any distinct values (0-based, negative, gapped) get their inversion parity."""
+        inversions = sum(
+            1
+            for i in range(len(values))
+            for j in range(i + 1, len(values))
+            if values[i] > values[j]
+        )
+        
+        assert permutation_sign(values) == (1 if inversions % 2 == 0 else -1)
+    
+    def test_zero_based_permutation(self):
+        """0-based permutations have the same sign as their 1-based shift."""
+        assert permutation_sign([1, 0, 2]) == -1
+        assert permutation_sign([1, 2, 0]) == 1
+    
     def test_identity_permutation_positive(self):
         """Identity permutation should always have sign +1."""
         assert permutation_sign([1, 2, 3, 4, 5]) == 1
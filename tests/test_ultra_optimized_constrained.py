@@ -0,0 +1,82 @@
+"""
+Tests for ultra-optimized constrained (fixed first column) enumeration.
+
+Feature: latin-rectangle-counter
+"""
+
+import pytest
+
+import core.ultra_optimized_constrained as ultra_optimized_constrained
+from core.first_column_enumerator import FirstColumnEnumerator
+from core.ultra_optimized_constrained import (
+    count_rectangles_ultra_optimized_constrained,
+    count_rectangles_ultra_optimized_constrained_completion,
+)
+
+
+# (positive, negative) counts of normalized Latin rectangles (see README)
+KNOWN_COUNTS = {
+    (2, 3): (2, 0), (3, 3): (2, 0),
+    (3, 4): (12, 12), (4, 4): (24, 0),
+    (3, 5): (312, 240), (4, 5): (384, 960), (5, 5): (384, 960),
+    (4, 6): (203040, 190080), (5, 6): (576000, 552960), (6, 6): (426240, 702720),
+}
+
+
+def _sum_over_first_columns(r: int, n: int, count_function, **kwargs):
+    """Sum per-first-column counts, scaled by the first-column symmetry factor."""
+    enumerator = FirstColumnEnumerator()
+    symmetry_factor = enumerator.get_symmetry_factor(r)
+    totals = None
+    for first_column in enumerator.enumerate_first_columns(r, n):
+        counts = count_function(r, n, first_column, **kwargs)
+        if totals is None:
+            totals = [0] * len(counts)
+        totals = [total + count * symmetry_factor for total, count in zip(totals, counts)]
+    return tuple(totals)
+
+
+class TestUltraOptimizedConstrainedCorrectness:
+    """Per-first-column counts must add up to the known full counts."""
+
+    @pytest.mark.parametrize("r,n", [(3, 5), (4, 5), (4, 6), (5, 6), (6, 6)])
+    @pytest.mark.parametrize("use_stack_approach", [None, True, False])
+    def test_matches_known_counts(self, r, n, use_stack_approach):
+        """Every depth, including former stack-approach depths, counts correctly."""
+        positive, negative = _sum_over_first_columns(
+            r, n, count_rectangles_ultra_optimized_constrained,
+            use_stack_approach=use_stack_approach
+        )
+
+        assert (positive, negative) == KNOWN_COUNTS[(r, n)]
+
+    @pytest.mark.parametrize("n", [3, 4, 5, 6])
+    def test_completion_matches_known_counts(self, n):
+        """(n-1, n) counting with completion also yields the (n, n) counts."""
+        r = n - 1
+        counts = _sum_over_first_columns(
+            r, n, count_rectangles_ultra_optimized_constrained_completion
+        )
+
+        assert counts == KNOWN_COUNTS[(r, n)] + KNOWN_COUNTS[(n, n)]
+
+    @pytest.mark.parametrize("r,n", [(3, 5), (4, 6), (3, 6)])
+    def test_first_columns_have_equal_counts(self, r, n):
+        """Every first column yields the same counts (tasks need no size ordering)."""
+        counts = {
+            count_rectangles_ultra_optimized_constrained(r, n, first_column)
+            for first_column in FirstColumnEnumerator().enumerate_first_columns(r, n)
+        }
+
+        assert len(counts) == 1
+
+    @pytest.mark.parametrize("memo_bytes", [0, 1 << 10])
+    def test_counts_survive_memo_eviction(self, monkeypatch, memo_bytes):
+        """A tiny subtree memo budget evicts constantly without changing counts."""
+        monkeypatch.setattr(ultra_optimized_constrained, "_SUBTREE_MEMO_BYTES", memo_bytes)
+
+        counts = _sum_over_first_columns(
+            5, 6, count_rectangles_ultra_optimized_constrained_completion
+        )
+
+        assert counts == KNOWN_COUNTS[(5, 6)] + KNOWN_COUNTS[(6, 6)]